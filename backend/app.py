@@ -1,27 +1,51 @@
 import os
+import time
 import shutil
 import uuid
 import json
+import logging
+from typing import List
 
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
 # ===== Correct Utils Imports =====
 from backend.utils.detect_faces_from_video import detect_faces_from_video
-from backend.utils.identify_person import find_best_person
-from backend.utils.frontalize_local import frontalize_local
+from backend.utils import enrolment, metrics
+from backend.utils.crop_store import CropStore
+from backend.utils.identify_person import (
+    IDENTITY_CACHE, find_best_person, identify_faces, iter_identify,
+)
+from backend.utils.content_store import ContentStore
+from backend.utils.jobs import JobManager
+from backend.utils.result_store import ResultStore
+from backend.utils.stream_ingest import GrowingFile, iter_growing_video
+from backend.utils.warmup import warmup
+
+# ===== Logging =====
+# Per-frame / per-face messages are DEBUG: below LOG_LEVEL they are never
+# even formatted, so the hot path pays nothing for them.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=LOG_LEVEL,
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+log = logging.getLogger(__name__)
 
 # ===== Directories =====
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
-TEMP_DIR = os.path.join(BASE_DIR, "temp")
-RESULTS_DIR = os.path.join(BASE_DIR, "results")
 FRONTEND_DIR = os.path.join(BASE_DIR, "frontend")
+# Everything the server writes lives under DATA_DIR (default: backend/)
+DATA_DIR = os.environ.get("DATA_DIR") or BASE_DIR
+UPLOAD_DIR = os.path.join(DATA_DIR, "uploads")
+TEMP_DIR = os.path.join(DATA_DIR, "temp")
+RESULTS_DIR = os.path.join(DATA_DIR, "results")
+# Private server state (jobs database): never mounted below
+STATE_DIR = os.path.join(DATA_DIR, "state")
 
 # Create necessary folders
-for d in [UPLOAD_DIR, TEMP_DIR, RESULTS_DIR]:
+for d in [UPLOAD_DIR, TEMP_DIR, RESULTS_DIR, STATE_DIR]:
     os.makedirs(d, exist_ok=True)
 
 app = FastAPI()
@@ -35,15 +59,184 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-LAST_MAPPING_PATH = os.path.join(TEMP_DIR, "last_faces_map.json")
+# ============================================================
+# 0) FAST START: models load lazily / in the background
+# ============================================================
+# YOLO, dlib and the gallery are loaded on first use. With WARMUP_ON_START
+# (default) a background thread loads them right after startup, so the
+# server answers /health at once and /ready turns 200 when all is loaded.
+WARMUP_ON_START = os.environ.get("WARMUP_ON_START", "1") != "0"
+
+# Jobs, faces and crops are shared through backend/state and temp/jobs, so
+# the app can run several uvicorn workers. A streamed upload is the one
+# exception: its PUT has to reach the worker that answered its POST
+# (_streams lives in that process).
+
+# Seconds between known_faces/ polls (0 = only reload through the API)
+GALLERY_WATCH_SECONDS = float(os.environ.get("GALLERY_WATCH_SECONDS", "5"))
+gallery_watcher = enrolment.GalleryWatcher(GALLERY_WATCH_SECONDS)
+
+
+@app.on_event("startup")
+def start_warmup():
+    if WARMUP_ON_START:
+        warmup.start()
+    gallery_watcher.start()
+
+
+@app.get("/health")
+async def health():
+    """Liveness: the process is up (models may still be loading)."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once every component is loaded, 503 before."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.post("/warmup")
+async def trigger_warmup(wait: bool = False):
+    """Starts loading anything not loaded yet; wait=true blocks until done."""
+    warmup.start()
+    if wait:
+        return await run_in_threadpool(warmup.wait)
+    return warmup.status()
+
+
+JOBS_DIR = os.path.join(TEMP_DIR, "jobs")
+
+# Per-job face mappings (SQLite in state/ + LRU), crops in temp/jobs/<job_id>
+store = ResultStore(os.path.join(STATE_DIR, "results.db"), JOBS_DIR)
+
+# Detector crops stay in memory (RGB) for identification; the JPEGs under
+# temp/jobs/<job_id>/faces are only written when their thumbnail is requested
+crops = CropStore(max_bytes=int(os.environ.get("CROP_STORE_MB", "256")) * 1024 * 1024)
+
+
+# Result images by content hash: one copy per distinct file, cacheable forever
+results_store = ContentStore(RESULTS_DIR)
+
+CACHE_FOREVER = "public, max-age=31536000, immutable"
+
+
+def _cached_file(request, path, etag, media_type=None):
+    """FileResponse with a strong ETag; 304 when the client already has it."""
+    tag = f'"{etag}"'
+    headers = {"ETag": tag, "Cache-Control": CACHE_FOREVER}
+    if tag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def _drop_job_files(job_id):
+    """Crops and thumbnails of an expired job, before its directory goes."""
+    face_dir = store.faces_dir(job_id)
+    if os.path.isdir(face_dir):
+        for name in os.listdir(face_dir):
+            if name.endswith(".jpg"):
+                results_store.drop_thumbnails(os.path.join(face_dir, name))
+    crops.discard(store.job_dir(job_id))
+
+
+def _evict_expired():
+    if store.evict_expired(on_expire=_drop_job_files):
+        # frontal images only the expired jobs still pointed to
+        keep = {os.path.basename(url) for url in store.face_values("frontalized_image")}
+        results_store.collect(keep)
 
 
 # ============================================================
-# 1) UPLOAD VIDEO → DETECT FACES
+# 1) UPLOAD VIDEO → DETECT FACES (background job)
 # ============================================================
+# Videos are processed on a worker pool so the event loop never blocks on
+# YOLO. Each job writes to its own directory, so jobs can run side by side.
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "2"))
+jobs = JobManager(max_workers=UPLOAD_WORKERS)
+
+# Time segments per uploaded file, each detected in its own process
+# (1 = in-process; streamed uploads always run in-process)
+UPLOAD_SHARDS = int(os.environ.get("UPLOAD_SHARDS", "1"))
+
+
+def _face_entry(job_id, idx, meta):
+    tid = f"face_{idx:04d}"
+    p = meta["img_path"]
+    return {
+        "job_id": job_id,
+        "track_id": tid,
+        "img_path": p,
+        "thumb": f"/jobs/{job_id}/thumbs/{os.path.basename(p)}?size=160",
+        "thumb_full": f"/jobs/{job_id}/thumbs/{os.path.basename(p)}",
+        "face_location": meta["face_location"],
+        "rotation": meta["rotation"],
+        "match": "Unknown",
+        "score": None,
+        "frontalized_image": None,
+    }
+
+
+def _process_upload(job, video_path, growing=None):
+    store.set_status(job.job_id, "running")
+    face_dir = store.faces_dir(job.job_id)
+    faces = []
+
+    # A streamed upload is decoded while it grows (only sampled frames are
+    # retrieved); one that is complete by now takes the file path instead,
+    # with its seeking decoder and UPLOAD_SHARDS
+    frames = None
+    if growing is not None and (not growing.complete or growing.error):
+        frames = lambda wants: iter_growing_video(growing, wants)
+
+    # Each face is stored as soon as it is saved → visible via /jobs/{id}/faces
+    def on_face(meta):
+        entry = _face_entry(job.job_id, len(faces), meta)
+        faces.append(entry)
+        store.add_faces(job.job_id, [entry])
+
+    try:
+        # Detect faces (with box + orientation for single-pass encoding)
+        detect_faces_from_video(
+            video_path, face_dir, with_meta=True, frames=frames, on_face=on_face,
+            shards=UPLOAD_SHARDS, crop_store=crops,
+            progress=lambda done, total, found: job.update_progress(done, total, found),
+        )
+    except Exception as e:
+        store.set_status(job.job_id, "error", str(e))
+        raise
+    finally:
+        # A streamed upload that was abandoned (no PUT, or the job gave up
+        # waiting) must not keep its GrowingFile open forever
+        stream = _streams.pop(job.job_id, None)
+        if stream is not None and not stream.complete:
+            stream.fail("job ended before the upload finished")
+
+    store.set_status(job.job_id, "done")
+
+    return {"job_id": job.job_id, "faces": faces}
+
+
+def _job_links(job):
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.job_id}",
+        "faces_url": f"/jobs/{job.job_id}/faces",
+        "result_url": f"/jobs/{job.job_id}/result",
+    }
+
+
 @app.post("/upload_video")
-async def upload_video(video: UploadFile = File(...)):
+def upload_video(video: UploadFile = File(...)):
+    """
+    Saves the video and returns a job id right away; poll /jobs/{job_id}.
+    Plain def: the copy to disk runs in the threadpool, not the event loop.
+    """
     try:
+        _evict_expired()
+
         filename = f"{uuid.uuid4().hex}_{video.filename}"
         video_path = os.path.join(UPLOAD_DIR, filename)
 
@@ -51,50 +244,143 @@ async def upload_video(video: UploadFile = File(...)):
         with open(video_path, "wb") as f:
             shutil.copyfileobj(video.file, f)
 
-        # Reset face folder
-        face_dir = os.path.join(TEMP_DIR, "faces")
-        if os.path.exists(face_dir):
-            shutil.rmtree(face_dir)
-        os.makedirs(face_dir)
-
-        # Detect faces
-        unique_paths = detect_faces_from_video(video_path, face_dir)
-
-        # Build mapping
-        mapping = {}
-        for idx, p in enumerate(unique_paths):
-            tid = f"face_{idx:04d}"
-            mapping[tid] = {
-                "track_id": tid,
-                "img_path": p,
-                "thumb": f"/temp/faces/{os.path.basename(p)}",
-                "match": "Unknown",
-                "score": None,
-                "frontalized_image": None,
-            }
-
-        # Save mapping
-        with open(LAST_MAPPING_PATH, "w") as f:
-            json.dump(mapping, f)
-
-        return {"faces": list(mapping.values())}
+        job = jobs.submit(_process_upload, video_path, before=store.create_job,
+                          trace=_job_trace())
+
+        return _job_links(job)
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# ------------------------------------------------------------
+# Streaming ingest: detection starts while the upload is running
+#   1. POST /upload_stream?filename=clip.mp4  → job_id + upload_url
+#   2. PUT  /upload_stream/{job_id}  with the raw video as body
+#   3. poll /jobs/{job_id} and /jobs/{job_id}/faces meanwhile
+# ------------------------------------------------------------
+_streams = {}   # job_id → GrowingFile still receiving data
+
+
+@app.post("/upload_stream")
+async def upload_stream_start(filename: str = "video.mp4"):
+    await run_in_threadpool(_evict_expired)
+
+    name = f"{uuid.uuid4().hex}_{os.path.basename(filename)}"
+    growing = GrowingFile(os.path.join(UPLOAD_DIR, name))
+
+    def start(job_id):
+        store.create_job(job_id)
+        _streams[job_id] = growing
+
+    job = jobs.submit(_process_upload, growing.path, growing,
+                      before=start, trace=_job_trace())
+
+    return dict(_job_links(job), upload_url=f"/upload_stream/{job.job_id}")
+
+
+@app.put("/upload_stream/{job_id}")
+async def upload_stream_body(job_id: str, request: Request):
+    growing = _streams.get(job_id)
+    if growing is None:
+        return {"error": "Unknown or finished upload"}
 
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(growing.write, chunk)
+        growing.finish()
     except Exception as e:
+        growing.fail(e)
         return {"error": str(e)}
+    finally:
+        _streams.pop(job_id, None)
+
+    return {"job_id": job_id, "bytes": growing.bytes_written}
+
+
+@app.get("/jobs/{job_id}/faces")
+async def job_faces(job_id: str):
+    """Faces found so far, while the job is still running."""
+    faces = store.get_faces(job_id)
+    if faces is None:
+        return {"error": "Unknown job_id"}
+
+    job = jobs.get(job_id)
+    info = job.to_dict() if job is not None else store.job_info(job_id)
+    return {"job_id": job_id, "status": info["status"], "faces": list(faces.values())}
+
+
+@app.get("/jobs/{job_id}/thumbs/{name}")
+def job_thumb(job_id: str, name: str, request: Request, size: int = None):
+    """
+    Crop JPEG, written from the in-memory crop on first request.
+    size=96|160 → small WebP variant, generated once and cached.
+    """
+    path = os.path.join(store.faces_dir(os.path.basename(job_id)), os.path.basename(name))
+    if crops.ensure_file(path) is None:
+        return JSONResponse({"error": "Unknown face"}, status_code=404)
+
+    if size is None:
+        return _cached_file(request, path, results_store.digest_file(path), "image/jpeg")
+
+    try:
+        thumb, etag = results_store.thumbnail(path, size)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    if thumb is None:
+        return JSONResponse({"error": "Unreadable face"}, status_code=404)
+    return _cached_file(request, thumb, etag, "image/webp")
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is not None:
+        return job.to_dict()
+
+    # Finished in an earlier process → only the stored status is left
+    info = store.job_info(job_id)
+    if info is None:
+        return {"error": "Unknown job_id"}
+    return info
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = jobs.get(job_id)
+    info = job.to_dict() if job is not None else store.job_info(job_id)
+
+    if info is None:
+        return {"error": "Unknown job_id"}
+    if info["status"] == "error":
+        return {"error": info["error"], "status": info["status"]}
+    if info["status"] != "done":
+        return {"error": "Job not finished", "status": info["status"]}
+
+    faces = store.get_faces(job_id) or {}
+    return {"job_id": job_id, "faces": list(faces.values())}
 
 
 # ============================================================
 # 2) IDENTIFY → STATIC FRONTAL (Option A)
 # ============================================================
+def _resolve_job(job_id):
+    """Explicit job id, or the most recent upload for old clients."""
+    job_id = job_id or store.latest_job()
+    if not job_id:
+        return None, None
+    return job_id, store.get_faces(job_id)
+
+
 @app.post("/frontalize")
-async def frontalize(track_id: str = Form(...)):
+def frontalize(track_id: str = Form(...), job_id: str = Form(None)):
+    # Plain def: loading the gallery / dlib encoding must not block the
+    # event loop (and with it /health and /ready)
 
-    if not os.path.exists(LAST_MAPPING_PATH):
+    job_id, mapping = _resolve_job(job_id)
+    if not mapping:
         return {"error": "Upload video first"}
 
-    with open(LAST_MAPPING_PATH) as f:
-        mapping = json.load(f)
-
     if track_id not in mapping:
         return {"error": "Invalid track_id"}
 
@@ -102,10 +388,25 @@ async def frontalize(track_id: str = Form(...)):
     face_path = entry["img_path"]
 
     # Identify person
-    best_person, score, frontal_paths = find_best_person(face_path)
+    best_person, score, frontal_paths = find_best_person(
+        face_path, entry.get("face_location"), entry.get("rotation"),
+        crop=crops.get(face_path),
+    )
+
+    result, fields = _apply_identity(job_id, track_id, best_person, score, frontal_paths)
+
+    # Update just this face
+    store.update_face(job_id, track_id, **fields)
+
+    return result
+
 
-    entry["match"] = best_person
-    entry["score"] = score
+def _apply_identity(job_id, track_id, best_person, score, frontal_paths):
+    """
+    Build the API response for a match plus the fields to store on the
+    face entry. Returns (response, fields).
+    """
+    fields = {"match": best_person, "score": score}
 
     if not frontal_paths:
         return {
@@ -113,30 +414,193 @@ async def frontalize(track_id: str = Form(...)):
             "match": best_person,
             "score": score,
             "error": "No frontal image found"
-        }
+        }, fields
 
-    # Copy frontal.jpg
-    out_path = frontalize_local(frontal_paths[0], RESULTS_DIR, track_id)
-    out_url = f"/results/{os.path.basename(out_path)}"
+    # frontal.jpg by content hash: stored once, however many faces match it
+    out_url = f"/objects/{results_store.put_file(frontal_paths[0])}"
 
-    entry["frontalized_image"] = out_url
-
-    # Save updated mapping
-    with open(LAST_MAPPING_PATH, "w") as f:
-        json.dump(mapping, f)
+    fields["frontalized_image"] = out_url
 
     return {
         "frontalized_image": out_url,
         "match": best_person,
         "score": score,
-    }
+    }, fields
+
+
+# ============================================================
+# 3) IDENTIFY MANY FACES IN ONE REQUEST
+# ============================================================
+@app.post("/identify_batch")
+def identify_batch(
+        track_ids: str = Form("all"),
+        stream: bool = Form(False),
+        job_id: str = Form(None)
+):
+    """
+    track_ids → "all" or comma-separated ids (face_0000,face_0003)
+    stream    → return NDJSON, one line per face as soon as it is ready
+
+    Crops are encoded in parallel (from memory when still in the crop
+    store) and matched in one vectorized call;
+    the stored faces are updated in a single transaction.
+    """
+    job_id, mapping = _resolve_job(job_id)
+    if not mapping:
+        return {"error": "Upload video first"}
+
+    if track_ids.strip().lower() == "all":
+        ids = list(mapping.keys())
+    else:
+        ids = [t.strip() for t in track_ids.split(",") if t.strip()]
+
+    invalid = [t for t in ids if t not in mapping]
+    if invalid:
+        return {"error": f"Invalid track_id: {', '.join(invalid)}"}
+
+    # In-memory crops go straight to the encoder (no JPEG decode)
+    items = [dict(mapping[t], crop=crops.get(mapping[t]["img_path"])) for t in ids]
+    updates = {}
+
+    if not stream:
+        results = []
+        for tid, (best_person, score, frontal_paths) in zip(ids, identify_faces(items)):
+            res, updates[tid] = _apply_identity(job_id, tid, best_person, score, frontal_paths)
+            results.append(dict(res, track_id=tid))
+        store.update_faces(job_id, updates)
+        return {"job_id": job_id, "results": results}
+
+    def ndjson():
+        try:
+            for idx, (best_person, score, frontal_paths) in iter_identify(items):
+                tid = ids[idx]
+                res, updates[tid] = _apply_identity(job_id, tid, best_person, score, frontal_paths)
+                yield json.dumps(dict(res, track_id=tid)) + "\n"
+        finally:
+            store.update_faces(job_id, updates)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+# ============================================================
+# 4) GALLERY ENROLMENT (known_faces/, reloaded without restart)
+# ============================================================
+# Each edit encodes only the affected images and swaps in a new gallery
+# snapshot; identifications already running finish on the old one.
+@app.get("/gallery")
+async def gallery_list():
+    return await run_in_threadpool(enrolment.list_gallery)
+
+
+@app.post("/gallery/{person}")
+def gallery_add(person: str, images: List[UploadFile] = File(...)):
+    try:
+        return enrolment.add_images(person, [(im.filename, im.file) for im in images])
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.delete("/gallery/{person}")
+def gallery_remove_person(person: str):
+    try:
+        return enrolment.remove_person(person)
+    except KeyError as e:
+        return {"error": f"Unknown person: {e.args[0]}"}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.delete("/gallery/{person}/{filename}")
+def gallery_remove_image(person: str, filename: str):
+    try:
+        return enrolment.remove_image(person, filename)
+    except KeyError as e:
+        return {"error": f"Unknown image: {e.args[0]}"}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+# ============================================================
+# 5) CONTENT-ADDRESSED RESULTS
+# ============================================================
+@app.get("/objects/{name}")
+def result_object(name: str, request: Request):
+    path = results_store.path(name)
+    if path is None:
+        return JSONResponse({"error": "Unknown object"}, status_code=404)
+    return _cached_file(request, path, os.path.splitext(name)[0])
+
+
+# ============================================================
+# 6) METRICS + OPT-IN PROFILING
+# ============================================================
+# GET /metrics → Prometheus text format: stage timings (decode, yolo,
+# crop, hash, read, write, thumbnail, encode, match), request latency per
+# route, job/pipeline queue depth, model load state, cache sizes.
+#
+# Any request with ?profile=1 or an "X-Profile: 1" header gets a
+# Server-Timing header with its per-stage breakdown; an upload started
+# that way also reports its job's stages under "profile" in /jobs/{id}.
+# Work done in shard or encoder processes is timed as a whole.
+PROFILING = os.environ.get("PROFILING", "1") != "0"
+
+
+def _wants_profile(request):
+    flag = request.query_params.get("profile") or request.headers.get("x-profile")
+    return PROFILING and flag in ("1", "true", "yes")
+
+
+def _job_trace():
+    """A trace of its own for a job started by a profiled request."""
+    return metrics.Trace() if metrics.current_trace() is not None else None
+
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    trace = metrics.Trace() if _wants_profile(request) else None
+    t0 = time.perf_counter()
+    with metrics.tracing(trace):
+        response = await call_next(request)
+
+    # Route template, not the raw path (job ids would explode the labels);
+    # streamed responses are timed up to their first byte.
+    route = getattr(request.scope.get("route"), "path", None) or "static"
+    metrics.HTTP_SECONDS.observe(time.perf_counter() - t0, method=request.method,
+                                 route=route, status=response.status_code)
+
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
+        log.info("profile %s %s: %s", request.method, request.url.path,
+                 json.dumps(trace.to_dict()["stages"]))
+    return response
+
+
+metrics.Gauge("facetrack_jobs", "Upload jobs by status (queued = waiting for a worker)",
+              ["status"], fn=jobs.status_counts)
+metrics.Gauge("facetrack_model_loaded", "1 once a heavy component is loaded",
+              ["component"], fn=lambda: {name: int(loaded())
+                                         for name, _, loaded in warmup.components})
+metrics.Gauge("facetrack_uploads_streaming", "Streamed uploads still receiving data",
+              fn=lambda: len(_streams))
+metrics.Gauge("facetrack_crop_store_bytes", "RGB crops held in memory",
+              fn=lambda: crops.nbytes)
+metrics.Gauge("facetrack_identity_cache_items", "Crops in the in-memory identity cache",
+              fn=lambda: len(IDENTITY_CACHE))
+metrics.Counter("facetrack_identity_cache_lookups_total", "Identity cache lookups",
+                ["result"], fn=lambda: {"hit": IDENTITY_CACHE.hits,
+                                        "miss": IDENTITY_CACHE.misses})
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 # ============================================================
 # STATIC ROUTES (Frontend)
 # ============================================================
+# temp/ is not mounted: crops are served by /jobs/{job_id}/thumbs
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
-app.mount("/temp", StaticFiles(directory=TEMP_DIR), name="temp")
 app.mount("/results", StaticFiles(directory=RESULTS_DIR), name="results")
 
 # 👉 Serve welcome.html as the homepage
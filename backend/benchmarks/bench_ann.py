@@ -0,0 +1,109 @@
+# backend/benchmarks/bench_ann.py
+#
+# Recall@1 / latency of the approximate matcher index vs. exact search on
+# synthetic 128-D galleries.
+#
+#   python -m backend.benchmarks.bench_ann
+#   python -m backend.benchmarks.bench_ann --sizes 10000 100000 --nprobe 4 8 16 --json
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backend.utils.matcher import GalleryMatcher, ENC_DIM
+
+
+# ------------------------------------------------------------------------
+# Synthetic gallery shaped like dlib encodings (‖x‖ ≈ 1, same-person ≈ 0.4)
+# ------------------------------------------------------------------------
+def make_gallery(size, per_person=4, seed=0):
+    rng = np.random.default_rng(seed)
+    n_people = max(1, size // per_person)
+
+    centers = rng.normal(0, 0.09, size=(n_people, ENC_DIM)).astype(np.float32)
+    labels = np.repeat(np.arange(n_people), per_person)[:size]
+    encs = centers[labels] + rng.normal(0, 0.025, size=(len(labels), ENC_DIM)).astype(np.float32)
+
+    return centers, labels, encs
+
+
+def make_queries(centers, count, seed=1):
+    rng = np.random.default_rng(seed)
+    who = rng.integers(0, len(centers), size=count)
+    noise = rng.normal(0, 0.025, size=(count, ENC_DIM)).astype(np.float32)
+    return centers[who] + noise
+
+
+def _timed_search(matcher, queries, **params):
+    t0 = time.perf_counter()
+    _, rows = matcher.search(queries, 1, **params)
+    return rows[:, 0], (time.perf_counter() - t0) / len(queries)
+
+
+# ------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------
+def run(sizes, nprobes, queries_n, nlist=None):
+    report = []
+
+    for size in sizes:
+        centers, labels, encs = make_gallery(size)
+        names = [str(i) for i in range(len(centers))]
+        queries = make_queries(centers, queries_n)
+
+        exact = GalleryMatcher(names, labels, encs, index="exact")
+        truth, exact_lat = _timed_search(exact, queries)
+
+        t0 = time.perf_counter()
+        ivf = GalleryMatcher(names, labels, encs, index="ivf", nlist=nlist)
+        build_s = time.perf_counter() - t0
+
+        row = {
+            "gallery_size": size,
+            "exact_ms_per_query": exact_lat * 1000,
+            "ivf_nlist": ivf.index.nlist,
+            "ivf_build_s": build_s,
+            "ivf": [],
+        }
+
+        for nprobe in nprobes:
+            found, lat = _timed_search(ivf, queries, nprobe=nprobe)
+            row["ivf"].append({
+                "nprobe": nprobe,
+                "recall_at_1": float(np.mean(found == truth)),
+                "ms_per_query": lat * 1000,
+                "speedup": exact_lat / lat if lat else None,
+            })
+
+        report.append(row)
+
+    return report
+
+
+def _print_table(report):
+    for row in report:
+        print(f"\nN={row['gallery_size']:>8}  exact {row['exact_ms_per_query']:.3f} ms/q  "
+              f"(ivf nlist={row['ivf_nlist']}, build {row['ivf_build_s']:.2f}s)")
+        print("  nprobe  recall@1   ms/q   speedup")
+        for r in row["ivf"]:
+            print(f"  {r['nprobe']:>6}  {r['recall_at_1']:8.3f}  {r['ms_per_query']:6.3f}  "
+                  f"{r['speedup']:7.1f}x")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="IVF vs exact matcher recall/latency")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    ap.add_argument("--nlist", type=int, default=None)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = ap.parse_args()
+
+    result = run(args.sizes, args.nprobe, args.queries, args.nlist)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_table(result)
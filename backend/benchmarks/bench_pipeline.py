@@ -0,0 +1,417 @@
+# backend/benchmarks/bench_pipeline.py
+#
+# End-to-end throughput / latency of the video → identity pipeline on
+# offline fixtures: a clip assembled from the known_faces/ images and
+# galleries scaled up with synthetic 128-D encodings.
+#
+#   python -m backend.benchmarks.bench_pipeline
+#   python -m backend.benchmarks.bench_pipeline --stages decode match --json
+#   python -m backend.benchmarks.bench_pipeline --out bench.json
+#
+# Stages whose dependencies are missing (ultralytics, face_recognition,
+# fastapi) are reported as skipped, so the suite runs anywhere.
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from backend.benchmarks.bench_ann import make_gallery, make_queries
+from backend.utils.encoding_index import KNOWN_BASE, IMAGE_EXTS
+
+STAGES = ("decode", "detect", "encode", "identify", "match", "api")
+
+
+# ------------------------------------------------------------------------
+# Measurement helpers
+# ------------------------------------------------------------------------
+def peak_rss_mb():
+    """Peak resident set size of this process and of its (finished) children."""
+    scale = 1024.0 if sys.platform != "darwin" else 1024.0 * 1024.0   # KB vs bytes
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {"self": round(own, 1), "children": round(children, 1)}
+
+
+def latency_stats(samples):
+    """Seconds → p50/p95/mean in milliseconds."""
+    if not samples:
+        return {"n": 0}
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "n": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 2) if seconds > 0 else None
+
+
+# ------------------------------------------------------------------------
+# Fixtures
+# ------------------------------------------------------------------------
+def gallery_images(base_dir=KNOWN_BASE):
+    return sorted(p for p in glob.glob(os.path.join(base_dir, "*", "*"))
+                  if p.lower().endswith(IMAGE_EXTS))
+
+
+def make_clip(path, images, seconds=20, fps=25, size=(1280, 720)):
+    """
+    Writes an MJPG clip that cycles through `images`, each held for an
+    equal share of the clip and drifting sideways so consecutive frames
+    differ (exercises tracking, dedup and adaptive sampling).
+    """
+    w, h = size
+    frames = int(seconds * fps)
+    hold = max(1, frames // max(1, len(images)))
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (w, h))
+
+    faces = []
+    for p in images:
+        img = cv2.imread(p)
+        if img is None:
+            continue
+        scale = (h * 0.7) / img.shape[0]
+        faces.append(cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+    if not faces:
+        raise RuntimeError("no readable gallery images for the clip")
+
+    for i in range(frames):
+        face = faces[(i // hold) % len(faces)]
+        fh, fw = face.shape[:2]
+        fw = min(fw, w)
+        x = int((w - fw) * ((i % hold) / float(hold)))
+        y = (h - fh) // 2
+
+        canvas = np.full((h, w, 3), 40, dtype=np.uint8)
+        canvas[y:y + fh, x:x + fw] = face[:, :fw]
+        writer.write(canvas)
+
+    writer.release()
+    return frames
+
+
+# ------------------------------------------------------------------------
+# Stages
+# ------------------------------------------------------------------------
+def bench_decode(ctx):
+    from backend.utils.video_decode import open_frames
+
+    rows = {}
+    for mode, stride in (("grab", 1), ("grab", ctx["frame_skip"]), ("seek", 15)):
+        frames, info = open_frames(ctx["clip"], lambda i, s=stride: i % s == 0,
+                                   mode=mode, stride=stride)
+        t0 = time.perf_counter()
+        count = sum(1 for _ in frames)
+        dt = time.perf_counter() - t0
+        rows[f"{info['mode']}_stride{stride}"] = {
+            "frames": count,
+            "frames_per_s": _rate(count, dt),
+            "video_frames_per_s": _rate(info["frames_total"], dt),
+        }
+    return rows
+
+
+def bench_detect(ctx):
+    from backend.utils.crop_store import CropStore
+    from backend.utils.detect_faces_from_video import detect_faces_from_video, warm_detector
+
+    t0 = time.perf_counter()
+    warm_detector()
+    load_s = time.perf_counter() - t0
+
+    crops = CropStore()
+    out_dir = os.path.join(ctx["tmp"], "faces")
+    stamps = []
+
+    t0 = time.perf_counter()
+    faces = detect_faces_from_video(
+        ctx["clip"], out_dir, max_unique_faces=10 ** 6, with_meta=True,
+        frame_skip=ctx["frame_skip"], crop_store=crops,
+        progress=lambda done, total, found: stamps.append(time.perf_counter()),
+    )
+    dt = time.perf_counter() - t0
+
+    # progress fires once per detected frame, plus once at the end
+    detected = max(0, len(stamps) - 1)
+    ctx["faces"] = [dict(f, crop=crops.get(f["img_path"])) for f in faces]
+
+    return {
+        "model_load_s": round(load_s, 3),
+        "frames_detected": detected,
+        "frames_per_s_detected": _rate(detected, dt),
+        "video_frames_per_s": _rate(ctx["frames_total"], dt),
+        "faces": len(faces),
+        "frame_interval": latency_stats(np.diff(stamps[:-1]).tolist()),
+    }
+
+
+def _encode_items(ctx):
+    """Detected crops if the detect stage ran, else the gallery images."""
+    items = ctx.get("faces") or [{"img_path": p} for p in ctx["images"]]
+    return items[:ctx["encode_limit"]]
+
+
+def bench_encode(ctx):
+    from backend.utils.encoding_service import EncodingService, encode_task, warm_encoder
+
+    warm_encoder()
+    tasks = [{"path": it["img_path"], "rgb": it.get("crop"),
+              "face_location": it.get("face_location"), "rotation": it.get("rotation"),
+              "search_rotations": True} for it in _encode_items(ctx)]
+
+    samples = []
+    for t in tasks:
+        t0 = time.perf_counter()
+        encode_task(t)
+        samples.append(time.perf_counter() - t0)
+
+    row = {"crops": len(tasks), "inline": dict(latency_stats(samples),
+                                               crops_per_s=_rate(len(tasks), sum(samples)))}
+
+    service = EncodingService(max_workers=ctx["workers"], min_parallel=1)
+    try:
+        service.warm_up()
+        t0 = time.perf_counter()
+        encs = service.encode(tasks)
+        dt = time.perf_counter() - t0
+    finally:
+        service.shutdown()
+
+    row["pool"] = {"workers": service.max_workers, "crops_per_s": _rate(len(tasks), dt),
+                   "encoded": sum(e is not None for e in encs)}
+    return row
+
+
+@contextmanager
+def _scratch_identity_cache():
+    """In-memory identity cache for the run; IDENTITY_CACHE_DB is left alone."""
+    from backend.utils import identify_person
+    from backend.utils.identity_cache import IdentityCache
+
+    saved = identify_person.IDENTITY_CACHE
+    identify_person.IDENTITY_CACHE = IdentityCache(max_items=saved.max_items)
+    try:
+        yield identify_person.IDENTITY_CACHE
+    finally:
+        identify_person.IDENTITY_CACHE = saved
+
+
+def bench_identify(ctx):
+    from backend.utils import identify_person
+
+    identify_person.get_gallery()
+    items = _encode_items(ctx)
+
+    def run(label):
+        samples = []
+        for it in items:
+            t0 = time.perf_counter()
+            identify_person.find_best_person(it["img_path"], it.get("face_location"),
+                                             it.get("rotation"), crop=it.get("crop"))
+            samples.append(time.perf_counter() - t0)
+        return label, latency_stats(samples)
+
+    with _scratch_identity_cache():
+        rows = dict([run("cold"), run("cached")])
+    rows["crops"] = len(items)
+    return rows
+
+
+def bench_match(ctx):
+    from backend.utils.embeddings import compare_embeddings
+    from backend.utils.matcher import GalleryMatcher
+
+    rows = []
+    for size in ctx["gallery_sizes"]:
+        centers, labels, encs = make_gallery(size)
+        names = [str(i) for i in range(len(centers))]
+        queries = make_queries(centers, ctx["queries"])
+
+        t0 = time.perf_counter()
+        matcher = GalleryMatcher(names, labels, encs)
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        matcher.match(queries, 0.55)
+        batch_s = time.perf_counter() - t0
+
+        single = []
+        for q in queries:
+            t0 = time.perf_counter()
+            compare_embeddings(q, matcher)
+            single.append(time.perf_counter() - t0)
+
+        rows.append({
+            "gallery_size": size,
+            "build_s": round(build_s, 4),
+            "batch_queries_per_s": _rate(len(queries), batch_s),
+            "single": dict(latency_stats(single), queries_per_s=_rate(len(single), sum(single))),
+        })
+    return rows
+
+
+def bench_api(ctx):
+    # No background warm-up / watcher: the benchmark measures cold paths itself
+    os.environ.setdefault("WARMUP_ON_START", "0")
+    os.environ.setdefault("GALLERY_WATCH_SECONDS", "0")
+    # Uploads, jobs database and results go to a scratch DATA_DIR
+    if "backend.app" in sys.modules:
+        raise RuntimeError("backend.app is already imported; cannot redirect its DATA_DIR")
+    os.environ["DATA_DIR"] = os.path.join(ctx["tmp"], "app_data")
+    from fastapi.testclient import TestClient
+    from backend.app import app
+
+    lat = {}
+
+    def timed(label, fn, *a, **kw):
+        t0 = time.perf_counter()
+        r = fn(*a, **kw)
+        lat.setdefault(label, []).append(time.perf_counter() - t0)
+        return r
+
+    with _scratch_identity_cache(), TestClient(app) as client:
+        t0 = time.perf_counter()
+        with open(ctx["clip"], "rb") as f:
+            job = timed("POST /upload_video", client.post, "/upload_video",
+                        files={"video": ("bench.avi", f, "video/x-msvideo")}).json()
+
+        job_id = job["job_id"]
+        status = {}
+        while time.perf_counter() - t0 < ctx["api_timeout"]:
+            status = timed("GET /jobs/{id}", client.get, f"/jobs/{job_id}").json()
+            if status.get("status") in ("done", "error"):
+                break
+            time.sleep(0.05)
+        job_s = time.perf_counter() - t0
+
+        faces = client.get(f"/jobs/{job_id}/result").json().get("faces", [])
+        for face in faces:
+            timed("GET thumb (webp)", client.get, face["thumb"])
+            timed("GET thumb (jpeg)", client.get, face["thumb_full"])
+
+        if faces:
+            timed("POST /identify_batch", client.post, "/identify_batch",
+                  data={"job_id": job_id})
+
+    return {
+        "job_status": status.get("status"),
+        "job_seconds": round(job_s, 3),
+        "faces": len(faces),
+        "latency": {k: latency_stats(v) for k, v in lat.items()},
+    }
+
+
+BENCHES = {
+    "decode": bench_decode,
+    "detect": bench_detect,
+    "encode": bench_encode,
+    "identify": bench_identify,
+    "match": bench_match,
+    "api": bench_api,
+}
+
+
+# ------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------
+def run(stages=STAGES, seconds=20, fps=25, size=(1280, 720), frame_skip=2,
+        gallery_sizes=(1000, 10000, 100000), queries=500, encode_limit=64,
+        workers=None, api_timeout=600):
+    tmp = tempfile.mkdtemp(prefix="bench_pipeline_")
+    ctx = {
+        "tmp": tmp,
+        "clip": os.path.join(tmp, "clip.avi"),
+        "images": gallery_images(),
+        "frame_skip": frame_skip,
+        "gallery_sizes": list(gallery_sizes),
+        "queries": queries,
+        "encode_limit": encode_limit,
+        "workers": workers or os.cpu_count() or 1,
+        "api_timeout": api_timeout,
+    }
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "clip": {"seconds": seconds, "fps": fps, "size": list(size),
+                     "source_images": len(ctx["images"])},
+        },
+        "stages": {},
+    }
+
+    try:
+        if any(s in stages for s in ("decode", "detect", "api")):
+            ctx["frames_total"] = make_clip(ctx["clip"], ctx["images"], seconds, fps, size)
+
+        for name in STAGES:
+            if name not in stages:
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                row = BENCHES[name](ctx)
+            except ImportError as e:
+                row = {"skipped": f"missing dependency: {e.name or e}"}
+            except Exception as e:
+                row = {"error": f"{type(e).__name__}: {e}"}
+
+            report["stages"][name] = {
+                "result": row,
+                "wall_s": round(time.perf_counter() - t0, 3),
+                "peak_rss_mb": peak_rss_mb(),
+            }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return report
+
+
+def _print_summary(report):
+    for name, stage in report["stages"].items():
+        print(f"\n[{name}]  {stage['wall_s']:.2f}s  peak RSS {stage['peak_rss_mb']['self']} MB")
+        print(json.dumps(stage["result"], indent=2))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="End-to-end pipeline throughput/latency")
+    ap.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    ap.add_argument("--seconds", type=float, default=20)
+    ap.add_argument("--fps", type=float, default=25)
+    ap.add_argument("--size", type=int, nargs=2, default=[1280, 720], metavar=("W", "H"))
+    ap.add_argument("--frame-skip", type=int, default=2)
+    ap.add_argument("--gallery-sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--encode-limit", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=None, help="encoding processes")
+    ap.add_argument("--out", default=None, help="also write the JSON report here")
+    ap.add_argument("--json", action="store_true", help="emit JSON instead of a summary")
+    args = ap.parse_args()
+
+    result = run(args.stages, args.seconds, args.fps, tuple(args.size), args.frame_skip,
+                 args.gallery_sizes, args.queries, args.encode_limit, args.workers)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_summary(result)
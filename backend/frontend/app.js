@@ -11,17 +11,27 @@ document.addEventListener("DOMContentLoaded", () => {
             return;
         }
 
-        const formData = new FormData();
-        formData.append("video", videoInput.files[0]);
+        const file = videoInput.files[0];
 
         alertBox.innerText = "⏳ Uploading...";
 
-        const res = await fetch("/upload_video", {
+        // Streaming ingest: detection starts while the file is still uploading
+        const startRes = await fetch(`/upload_stream?filename=${encodeURIComponent(file.name)}`, {
             method: "POST",
-            body: formData,
         });
 
-        const data = await res.json();
+        const job = await startRes.json();
+
+        if (job.error) {
+            alertBox.innerText = "❌ " + job.error;
+            return;
+        }
+
+        fetch(job.upload_url, { method: "PUT", body: file })
+            .catch(() => { alertBox.innerText = "❌ Upload failed."; });
+
+        // Processing runs in the background → poll until done
+        const data = await waitForJob(job.job_id);
 
         if (data.error) {
             alertBox.innerText = "❌ " + data.error;
@@ -32,4 +42,28 @@ document.addEventListener("DOMContentLoaded", () => {
 
         window.location.href = "/results.html";
     });
+
+    async function waitForJob(jobId) {
+        while (true) {
+            const res = await fetch(`/jobs/${jobId}`);
+            const status = await res.json();
+
+            if (status.error && status.status !== "error") return status;
+
+            if (status.status === "done" || status.status === "error") {
+                const result = await fetch(`/jobs/${jobId}/result`);
+                return result.json();
+            }
+
+            let msg = `⏳ Processing... ${status.faces_found} face(s) found`;
+            if (status.frames_total) {
+                const pct = Math.round(100 * status.frames_processed / status.frames_total);
+                msg += ` (${pct}%)`;
+            }
+            if (status.eta_seconds != null) msg += `, ~${Math.ceil(status.eta_seconds)}s left`;
+            alertBox.innerText = msg;
+
+            await new Promise(r => setTimeout(r, 1000));
+        }
+    }
 });
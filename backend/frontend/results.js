@@ -17,7 +17,7 @@ faces.forEach(face => {
 
     const btn = document.createElement("button");
     btn.textContent = "Frontalize";
-    btn.onclick = () => frontalizeFace(face.track_id);
+    btn.onclick = () => frontalizeFace(face.track_id, face.job_id);
 
     div.appendChild(img);
     div.appendChild(p);
@@ -27,11 +27,12 @@ faces.forEach(face => {
 });
 
 
-async function frontalizeFace(track_id) {
+async function frontalizeFace(track_id, job_id) {
     alertBox.innerText = "⏳ Frontalizing...";
 
     const fd = new FormData();
     fd.append("track_id", track_id);
+    if (job_id) fd.append("job_id", job_id);
 
     let res;
     try {
@@ -0,0 +1,74 @@
+# backend/tests/test_content_store.py
+#
+#   python -m pytest backend/tests
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+from backend.utils.content_store import THUMB_SIZES, ContentStore
+from backend.utils.result_store import ResultStore
+
+
+def _jpeg(path, seed):
+    img = np.random.default_rng(seed).integers(0, 255, (64, 48, 3), dtype=np.uint8)
+    cv2.imwrite(str(path), img)
+    return str(path)
+
+
+def _age(path, seconds):
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+def test_collect_keeps_referenced_and_recent_objects(tmp_path):
+    cs = ContentStore(str(tmp_path / "results"))
+    kept = cs.put_file(_jpeg(tmp_path / "a.jpg", 0))
+    dropped = cs.put_file(_jpeg(tmp_path / "b.jpg", 1))
+    recent = cs.put_file(_jpeg(tmp_path / "c.jpg", 2))
+    for name in (kept, dropped):
+        _age(cs.path(name), 7200)
+
+    assert cs.collect({kept}, min_age=3600) == 1
+    assert cs.path(kept) and cs.path(recent)
+    assert cs.path(dropped) is None
+
+
+def test_put_file_refreshes_existing_object(tmp_path):
+    cs = ContentStore(str(tmp_path / "results"))
+    src = _jpeg(tmp_path / "a.jpg", 0)
+    name = cs.put_file(src)
+    _age(cs.path(name), 7200)
+
+    assert cs.put_file(src) == name      # handed out again → not garbage yet
+    assert cs.collect(set(), min_age=3600) == 0
+
+
+def test_drop_thumbnails(tmp_path):
+    cs = ContentStore(str(tmp_path / "results"))
+    src = _jpeg(tmp_path / "face.jpg", 0)
+    other = _jpeg(tmp_path / "other.jpg", 1)
+    thumbs = [cs.thumbnail(src, w)[0] for w in THUMB_SIZES]
+    other_thumb, _ = cs.thumbnail(other, THUMB_SIZES[0])
+
+    cs.drop_thumbnails(src)
+    assert not any(os.path.exists(t) for t in thumbs)
+    assert os.path.exists(other_thumb)
+
+
+def test_evict_expired_hook_and_face_values(tmp_path):
+    store = ResultStore(str(tmp_path / "state" / "results.db"), str(tmp_path / "jobs"),
+                        ttl_seconds=3600)
+    for job_id, url in (("old", "/objects/aa.jpg"), ("new", "/objects/bb.jpg")):
+        store.create_job(job_id)
+        store.add_faces(job_id, [{"track_id": "face_0000", "frontalized_image": url},
+                                 {"track_id": "face_0001", "frontalized_image": None}])
+    store._db.execute("UPDATE jobs SET created = ? WHERE job_id = 'old'", (time.time() - 7200,))
+
+    seen = []
+    assert store.evict_expired(on_expire=lambda j: seen.append((j, os.path.isdir(store.job_dir(j))))) == ["old"]
+    assert seen == [("old", True)]
+    assert not os.path.exists(store.job_dir("old"))
+    assert store.face_values("frontalized_image") == {"/objects/bb.jpg"}
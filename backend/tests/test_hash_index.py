@@ -0,0 +1,95 @@
+# backend/tests/test_hash_index.py
+#
+#   python -m pytest backend/tests
+
+import glob
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from backend.utils.detect_faces_from_video import DEDUP_RADIUS
+from backend.utils.encoding_index import KNOWN_BASE
+from backend.utils.hash_index import HashIndex, hamming, phash64
+
+imagehash = pytest.importorskip("imagehash")
+from PIL import Image  # noqa: E402
+
+
+def _gallery():
+    paths = sorted(glob.glob(os.path.join(KNOWN_BASE, "*", "*.jpg")))
+    return [cv2.cvtColor(cv2.imread(p), cv2.COLOR_BGR2RGB) for p in paths]
+
+
+def _variants(img, rng, n=8):
+    """The crop plus re-detections of it: small shift/scale, exposure, JPEG, size."""
+    h, w = img.shape[:2]
+    out = [img]
+    for _ in range(n):
+        dy, dx = rng.integers(-(h // 50), h // 50 + 1, 2)
+        s = rng.uniform(0.97, 1.03)
+        v = cv2.warpAffine(img, np.float32([[s, 0, dx], [0, s, dy]]), (w, h),
+                           borderMode=cv2.BORDER_REFLECT)
+        v = np.clip(v * rng.uniform(0.8, 1.2) + rng.uniform(-20, 20), 0, 255).astype(np.uint8)
+        _, buf = cv2.imencode(".jpg", v, [cv2.IMWRITE_JPEG_QUALITY, int(rng.integers(50, 95))])
+        size = int(rng.integers(60, 300))
+        out.append(cv2.resize(cv2.imdecode(buf, cv2.IMREAD_UNCHANGED), (size, size)))
+    return out
+
+
+def _imagehash(img):
+    return int(str(imagehash.phash(Image.fromarray(img), hash_size=8)), 16)
+
+
+def test_dedup_radius_agrees_with_imagehash():
+    """phash64 within DEDUP_RADIUS ≈ the old imagehash `distance < 12` test."""
+    gallery = _gallery()
+    assert gallery, "no gallery images to hash"
+
+    rng = np.random.default_rng(0)
+    groups = [_variants(img, rng) for img in gallery]
+    ours = [[phash64(v) for v in g] for g in groups]
+    ref = [[_imagehash(v) for v in g] for g in groups]
+
+    agree = same = total_same = merged = total_diff = 0
+    for gi, (a, b) in enumerate(zip(ours, ref)):
+        # same face: every pair of variants
+        for i in range(len(a)):
+            for j in range(i + 1, len(a)):
+                hit = hamming(a[i], a[j]) <= DEDUP_RADIUS
+                agree += hit == (hamming(b[i], b[j]) < 12)
+                same += hit
+                total_same += 1
+        # different faces: same variant index of every later image
+        for gj in range(gi + 1, len(ours)):
+            for i in range(len(a)):
+                hit = hamming(a[i], ours[gj][i]) <= DEDUP_RADIUS
+                agree += hit == (hamming(b[i], ref[gj][i]) < 12)
+                merged += hit
+                total_diff += 1
+
+    assert agree / (total_same + total_diff) > 0.97
+    assert same / total_same > 0.7
+    assert merged / total_diff < 0.01
+
+
+def test_phash64_gray_and_rgb():
+    img = _gallery()[0]
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    assert phash64(img) == phash64(gray)
+    assert phash64(img).bit_length() <= 64
+
+
+def test_hash_index_radius_search():
+    rng = np.random.default_rng(1)
+    hashes = [int(x) for x in rng.integers(0, 2 ** 63, 500, dtype=np.int64)]
+    index = HashIndex()
+    for i, h in enumerate(hashes):
+        index.add(h, i)
+
+    q = hashes[7] ^ 0b1011
+    expected = sorted(i for i, h in enumerate(hashes) if hamming(q, h) <= 5)
+    assert sorted(item for _, _, item in index.search(q, 5)) == expected
+    assert index.contains_near(q, 3)
+    assert not index.contains_near(q, 2)
@@ -0,0 +1,149 @@
+# backend/tests/test_matcher.py
+#
+#   python -m pytest backend/tests
+
+import numpy as np
+import pytest
+
+from backend.utils import matcher as matcher_mod
+from backend.utils.matcher import ENC_DIM, GalleryMatcher, as_matcher
+
+
+def _gallery(people=50, per_person=4, seed=0):
+    """Clustered 128-D gallery shaped like dlib encodings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 0.09, size=(people, ENC_DIM)).astype(np.float32)
+    labels = np.repeat(np.arange(people), per_person)
+    encs = centers[labels] + rng.normal(0, 0.025, size=(len(labels), ENC_DIM)).astype(np.float32)
+    names = [f"person_{i}" for i in range(people)]
+    return names, labels, encs, centers
+
+
+def _queries(centers, count, seed=1):
+    rng = np.random.default_rng(seed)
+    who = rng.integers(0, len(centers), size=count)
+    return centers[who] + rng.normal(0, 0.025, size=(count, ENC_DIM)).astype(np.float32)
+
+
+def _brute_force(queries, encs):
+    return np.linalg.norm(queries[:, None, :] - encs[None, :, :], axis=2)
+
+
+# ------------------------------------------------------------------------
+# Exact search
+# ------------------------------------------------------------------------
+@pytest.mark.parametrize("max_block", [matcher_mod.MAX_BLOCK, 500])
+def test_exact_search_matches_brute_force(monkeypatch, max_block):
+    monkeypatch.setattr(matcher_mod, "MAX_BLOCK", max_block)   # 500 → many blocks
+    names, labels, encs, centers = _gallery()
+    queries = _queries(centers, 40)
+    m = GalleryMatcher(names, labels, encs)
+
+    full = _brute_force(queries, encs)
+    dists, rows = m.search(queries, k=5)
+
+    np.testing.assert_array_equal(rows, np.argsort(full, axis=1)[:, :5])
+    np.testing.assert_allclose(dists, np.sort(full, axis=1)[:, :5], atol=1e-4)
+
+    per_person = np.stack([full[:, labels == i].min(axis=1) for i in range(len(names))], axis=1)
+    np.testing.assert_allclose(m.person_distances(queries), per_person, atol=1e-4)
+
+    best = per_person.argmin(axis=1)
+    for (name, dist), b, row in zip(m.match(queries, 0.55), best, per_person):
+        assert name == names[b]
+        assert dist == pytest.approx(row[b], abs=1e-4)
+
+
+def test_exact_match_threshold_and_k_larger_than_gallery():
+    names, labels, encs, _ = _gallery(people=2, per_person=2)
+    m = GalleryMatcher(names, labels, encs)
+
+    far = np.full(ENC_DIM, 5.0, dtype=np.float32)
+    name, dist = m.match_one(far, 0.55)
+    assert name == "Unknown" and np.isfinite(dist)
+
+    dists, rows = m.search(encs[:1], k=10)
+    assert rows.shape == (1, 4) and rows[0, 0] == 0
+    assert dists[0, 0] == pytest.approx(0.0, abs=1e-3)
+
+
+# ------------------------------------------------------------------------
+# from_dict edge cases
+# ------------------------------------------------------------------------
+def test_from_dict_empty_gallery():
+    for known in ({}, {"nobody": []}, None):
+        m = as_matcher(known)
+        assert len(m) == 0
+        assert m.match(np.zeros((3, ENC_DIM), np.float32), 0.55) == [("Unknown", float("inf"))] * 3
+        assert m.person_distances(np.zeros(ENC_DIM, np.float32)).shape == (1, 0)
+
+
+def test_from_dict_drops_singleton_axes_and_skips_other_dims():
+    rng = np.random.default_rng(0)
+    alice = rng.normal(size=(3, 1, ENC_DIM)).astype(np.float32)
+    bob = rng.normal(size=(1, 1, ENC_DIM)).astype(np.float32)
+    known = {
+        "alice": alice,                                          # (N, 1, 128)
+        "bob": bob,                                              # (1, 1, 128)
+        "carol": rng.normal(size=(2, 1, 512)).astype(np.float32),  # other model
+        "dave": [rng.normal(size=ENC_DIM).tolist()],             # list of vectors
+    }
+
+    m = GalleryMatcher.from_dict(known)
+    assert m.names == ["alice", "bob", "dave"]
+    assert len(m) == 5
+    assert m.match_one(alice[1, 0], 0.55)[0] == "alice"
+    assert m.match_one(bob[0, 0], 0.55)[0] == "bob"
+
+
+def test_from_dict_only_512d_entries_is_empty():
+    rng = np.random.default_rng(0)
+    m = GalleryMatcher.from_dict({"x": rng.normal(size=(4, 1, 512))})
+    assert len(m) == 0
+    assert m.match_one(np.zeros(ENC_DIM, np.float32), 0.55)[0] == "Unknown"
+
+
+# ------------------------------------------------------------------------
+# IVF index
+# ------------------------------------------------------------------------
+def test_ivf_recall_against_exact():
+    names, labels, encs, centers = _gallery(people=1000, per_person=4)
+    queries = _queries(centers, 300)
+
+    exact = GalleryMatcher(names, labels, encs)
+    ivf = GalleryMatcher(names, labels, encs, index="ivf", nprobe=8, seed=0)
+    assert 1 < ivf.index.nlist < len(encs)
+
+    truth = exact.search(queries, 1)[1][:, 0]
+    found = ivf.search(queries, 1)[1][:, 0]
+    assert np.mean(found == truth) >= 0.95
+
+    agree = [a[0] == b[0] for a, b in zip(exact.match(queries, 0.55), ivf.match(queries, 0.55))]
+    assert np.mean(agree) >= 0.95
+
+    # probing every list is an exact search
+    _, rows = ivf.search(queries, 1, nprobe=ivf.index.nlist)
+    np.testing.assert_array_equal(rows[:, 0], truth)
+
+
+def test_ivf_gallery_smaller_than_nlist():
+    names, labels, encs, centers = _gallery(people=3, per_person=2)
+    queries = _queries(centers, 20)
+
+    ivf = GalleryMatcher(names, labels, encs, index="ivf", nlist=64)
+    assert ivf.index.nlist == len(encs)
+
+    exact = GalleryMatcher(names, labels, encs)
+    np.testing.assert_array_equal(ivf.search(queries, 1)[1], exact.search(queries, 1)[1])
+    assert [n for n, _ in ivf.match(queries, 0.55)] == [n for n, _ in exact.match(queries, 0.55)]
+
+    dists, rows = ivf.search(queries[:1], k=10)
+    assert (rows[0, :len(encs)] >= 0).all() and (rows[0, len(encs):] == -1).all()
+    assert np.isinf(dists[0, len(encs):]).all()
+
+
+def test_ivf_empty_gallery():
+    m = GalleryMatcher.from_dict({}, index="ivf")
+    dists, rows = m.search(np.zeros((2, ENC_DIM), np.float32), 3)
+    assert (rows == -1).all() and np.isinf(dists).all()
+    assert m.match_one(np.zeros(ENC_DIM, np.float32), 0.55)[0] == "Unknown"
@@ -0,0 +1,174 @@
+# backend/utils/content_store.py
+
+import os
+import re
+import shutil
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+
+import cv2
+
+from backend.utils import metrics
+
+
+# Thumbnail widths the API will generate (anything else is refused)
+THUMB_SIZES = (96, 160)
+
+_NAME_RE = re.compile(r"^[0-9a-f]{32}\.[a-z0-9]+$")
+
+
+# ------------------------------------------------------------------------
+# Content-addressed files: same bytes → same name → stored once
+# ------------------------------------------------------------------------
+class ContentStore:
+    """
+    Files are named after a hash of their content (<hash><ext>) and laid
+    out as root/objects/<2 chars>/<name>, so identical outputs — the same
+    frontal.jpg matched for a hundred faces — are written once and every
+    response just references the name. A name never changes content,
+    which makes it a strong ETag and lets clients cache it forever.
+
+    Thumbnails (root/thumbs/<source hash>-<width>.webp) are generated on
+    first request per source content and width, then reused.
+
+    Nothing is refcounted: the owner drops thumbnails with their source
+    (drop_thumbnails) and sweeps objects nothing references (collect).
+    """
+
+    def __init__(self, root, max_memo=4096):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.thumbs_dir = os.path.join(root, "thumbs")
+        self.max_memo = max_memo
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.thumbs_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()   # (path, mtime_ns, size) → hash
+
+    # --------------------------------------------------------------------
+    # Hashing (memoised per file version, so repeat calls skip the read)
+    # --------------------------------------------------------------------
+    def digest_file(self, path):
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            digest = self._memo.get(key)
+            if digest is not None:
+                self._memo.move_to_end(key)
+                return digest
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()[:32]
+
+        with self._lock:
+            self._memo[key] = digest
+            while len(self._memo) > self.max_memo:
+                self._memo.popitem(last=False)
+        return digest
+
+    # --------------------------------------------------------------------
+    # Objects
+    # --------------------------------------------------------------------
+    def _object_path(self, name):
+        return os.path.join(self.objects_dir, name[:2], name)
+
+    def put_file(self, src_path):
+        """Adds a file (copied only if its content is new); returns its name."""
+        ext = os.path.splitext(src_path)[1].lower() or ".bin"
+        name = self.digest_file(src_path) + ext
+        dst = self._object_path(name)
+
+        if os.path.exists(dst):
+            os.utime(dst)     # recently handed out → spared by collect()
+        else:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp = f"{dst}.{threading.get_ident()}.tmp"
+            with metrics.timer("write"):
+                shutil.copyfile(src_path, tmp)
+            os.replace(tmp, dst)
+        return name
+
+    def path(self, name):
+        """Path of a stored object, or None for unknown/invalid names."""
+        if not _NAME_RE.match(name or ""):
+            return None
+        p = self._object_path(name)
+        return p if os.path.exists(p) else None
+
+    def collect(self, keep, min_age=3600):
+        """
+        Deletes objects whose name is not in `keep` and that were not
+        stored or handed out in the last `min_age` seconds (so a name just
+        returned by put_file but not yet recorded survives). Returns the
+        number of files removed.
+        """
+        cutoff = time.time() - min_age
+        removed = 0
+        for folder, _, files in os.walk(self.objects_dir):
+            for name in files:
+                if name in keep:
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    # --------------------------------------------------------------------
+    # Thumbnails
+    # --------------------------------------------------------------------
+    def drop_thumbnails(self, src_path):
+        """Deletes every thumbnail made from src_path's current content."""
+        try:
+            digest = self.digest_file(src_path)
+        except OSError:
+            return
+        for width in THUMB_SIZES:
+            try:
+                os.remove(os.path.join(self.thumbs_dir, f"{digest}-{width}.webp"))
+            except OSError:
+                pass
+
+    def thumbnail(self, src_path, width, quality=80):
+        """
+        Returns (path, etag) of a WebP of src_path scaled to `width` pixels
+        wide, creating it on first use. Raises ValueError for sizes not in
+        THUMB_SIZES and returns (None, None) if the source is unreadable.
+        """
+        if width not in THUMB_SIZES:
+            raise ValueError(f"Thumbnail size must be one of {THUMB_SIZES}")
+
+        etag = f"{self.digest_file(src_path)}-{width}"
+        dst = os.path.join(self.thumbs_dir, f"{etag}.webp")
+        if os.path.exists(dst):
+            return dst, etag
+
+        with metrics.timer("thumbnail"):
+            img = cv2.imread(src_path)
+            if img is None:
+                return None, None
+
+            h, w = img.shape[:2]
+            size = (width, max(1, round(h * width / float(w))))
+            small = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+            ok, buf = cv2.imencode(".webp", small, [cv2.IMWRITE_WEBP_QUALITY, quality])
+            if not ok:
+                return None, None
+
+        tmp = f"{dst}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(buf.tobytes())
+        os.replace(tmp, dst)
+        return dst, etag
@@ -0,0 +1,127 @@
+# backend/utils/crop_store.py
+
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from backend.utils import metrics
+
+
+# ------------------------------------------------------------------------
+# RGB crops kept in memory between detection and identification
+# ------------------------------------------------------------------------
+class CropStore:
+    """
+    Holds detector crops as RGB arrays, keyed by the JPEG path they would
+    have been written to, plus their metadata (box, face_location, ...).
+    Identification reads the array directly — no JPEG encode/decode, no
+    colour conversion, no recompression loss. JPEGs are only written by
+    ensure_file, i.e. for thumbnails someone actually requests.
+
+    Every crop is also saved raw next to its JPEG path (<path>.rgb.npy, a
+    plain copy, no encoding), so other server processes, and this one
+    after a restart or once the crop has left memory, read the same
+    pixels. max_bytes bounds the arrays held in memory; the least recently
+    used ones are simply dropped.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self._crops = OrderedDict()   # path → (rgb, meta)
+
+    def __len__(self):
+        return len(self._crops)
+
+    def __contains__(self, path):
+        return path in self._crops
+
+    def put(self, path, rgb, meta=None):
+        self._save_raw(path, rgb)
+
+        with self._lock:
+            old = self._crops.pop(path, None)
+            if old is not None:
+                self.nbytes -= old[0].nbytes
+
+            self._crops[path] = (rgb, meta or {})
+            self.nbytes += rgb.nbytes
+
+            while self.nbytes > self.max_bytes and len(self._crops) > 1:
+                _, (arr, _) = self._crops.popitem(last=False)
+                self.nbytes -= arr.nbytes
+        return path
+
+    def get(self, path):
+        """RGB array (read-only by convention) or None."""
+        with self._lock:
+            item = self._crops.get(path)
+            if item is not None:
+                self._crops.move_to_end(path)
+                return item[0]
+        return self._load_raw(path)
+
+    def meta(self, path):
+        with self._lock:
+            item = self._crops.get(path)
+            return item[1] if item is not None else None
+
+    def discard(self, prefix):
+        """Forget every crop under `prefix` (e.g. a deleted job directory)."""
+        with self._lock:
+            for path in [p for p in self._crops if p.startswith(prefix)]:
+                rgb, _ = self._crops.pop(path)
+                self.nbytes -= rgb.nbytes
+
+    # --------------------------------------------------------------------
+    # Lazy JPEG
+    # --------------------------------------------------------------------
+    def ensure_file(self, path):
+        """Writes the JPEG on first request; returns path or None if unknown."""
+        if os.path.exists(path):
+            return path
+
+        rgb = self.get(path)
+        if rgb is None or not self._write(path, rgb):
+            return None
+        return path
+
+    @staticmethod
+    def _write(path, rgb):
+        folder = os.path.dirname(path)
+        if not os.path.isdir(folder):
+            return False      # job already evicted
+
+        # write + rename: a concurrent reader never sees half a file
+        tmp = f"{path}.{threading.get_ident()}.tmp.jpg"
+        with metrics.timer("write"):
+            if not cv2.imwrite(tmp, cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)):
+                return False
+        os.replace(tmp, path)
+        return True
+
+    # --------------------------------------------------------------------
+    # Raw copy shared with other processes
+    # --------------------------------------------------------------------
+    @staticmethod
+    def _raw_path(path):
+        return f"{path}.rgb.npy"
+
+    def _save_raw(self, path, rgb):
+        raw = self._raw_path(path)
+        tmp = f"{raw}.{threading.get_ident()}.tmp.npy"
+        try:
+            np.save(tmp, np.ascontiguousarray(rgb))
+            os.replace(tmp, raw)
+        except OSError:
+            pass          # job directory gone; the in-memory copy still works
+
+    def _load_raw(self, path):
+        try:
+            return np.load(self._raw_path(path))
+        except (OSError, ValueError):
+            return None
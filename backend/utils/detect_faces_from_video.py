@@ -1,19 +1,55 @@
 # backend/utils/detect_faces_from_video.py
 
 import os
+import math
+import time
+import queue
+import logging
+import threading
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from PIL import Image
-import imagehash
 
-# Load YOLO face model
+from backend.utils import metrics
+from backend.utils.face_tracker import FaceTracker, crop_quality
+from backend.utils.frame_sampler import AdaptiveSampler, FixedSampler
+from backend.utils.video_decode import open_frames
+from backend.utils.hash_index import HashIndex, phash64
+
+log = logging.getLogger(__name__)
+
+# YOLO face model (loaded on first use, see get_yolo)
 MODEL_PATH = os.path.abspath(os.path.join(
     os.path.dirname(__file__),
     "..", "models", "yolov8m-face.pt"
 ))
-print("[INFO] Using YOLO model:", MODEL_PATH)
-yolo = YOLO(MODEL_PATH)
+
+_yolo = None
+_yolo_lock = threading.Lock()
+
+
+def get_yolo():
+    """
+    Returns the shared YOLO model, loading it on the first call. ultralytics
+    (and torch) are imported here too, so importing this module stays cheap.
+    """
+    global _yolo
+    if _yolo is None:
+        with _yolo_lock:
+            if _yolo is None:
+                from ultralytics import YOLO
+                log.info("Using YOLO model: %s", MODEL_PATH)
+                _yolo = YOLO(MODEL_PATH)
+    return _yolo
+
+
+def yolo_loaded():
+    return _yolo is not None
+
+
+def warm_detector(detect_size=640):
+    """Loads YOLO and runs one dummy batch (first call initialises kernels)."""
+    blank = np.zeros((detect_size, detect_size, 3), dtype=np.uint8)
+    get_yolo()([blank], verbose=False, imgsz=detect_size)
 
 
 # ---------------------------------------------------------
@@ -22,6 +58,12 @@ yolo = YOLO(MODEL_PATH)
 def _force_bgr_uint8(img):
     if img is None:
         return None
+
+    # Fast path: decoder output is already BGR uint8 → no copy
+    if isinstance(img, np.ndarray) and img.dtype == np.uint8 \
+            and img.ndim == 3 and img.shape[2] == 3:
+        return img
+
     img = np.asarray(img)
 
     if img.dtype != np.uint8:
@@ -45,122 +87,660 @@ def _force_bgr_uint8(img):
     return img
 
 
-# perceptual hash
+# perceptual hash → packed 64-bit int (OpenCV phash, see hash_index)
 def get_hash(img):
-    return imagehash.phash(Image.fromarray(img), hash_size=8)
+    return phash64(img)
+
+
+# Two crops within this many bits are the same face; calibrated on phash64
+# to agree with the old imagehash `< 12` test (tests/test_hash_index.py)
+DEDUP_RADIUS = 11
 
 
 # ---------------------------------------------------------
-# MAIN DETECTOR
+# HELPER — rotate portrait frames to landscape
 # ---------------------------------------------------------
-def detect_faces_from_video(
-        video_path,
-        output_dir,
-        max_unique_faces=8,
-        frame_skip=2,
-        resize_dim=(400, 400)
-):
-    os.makedirs(output_dir, exist_ok=True)
+def _prepare_frame(frame, detect_size=None):
+    """
+    Returns (frame, det_frame, frame_rot, scale), or None for unusable frames.
+
+    frame     → full-resolution BGR frame, never rotated or copied
+    det_frame → what YOLO sees: downscaled so its long side is at most
+                detect_size, then turned to landscape
+    frame_rot → how far det_frame was turned clockwise (0 or 90)
+    scale     → det_frame pixels per full-frame pixel
+    """
+    frame = _force_bgr_uint8(frame)
+    if frame is None:
+        return None
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print("[ERROR] Cannot open video:", video_path)
-        return []
+    h, w = frame.shape[:2]
+    det_frame = frame
+    scale = 1.0
 
-    print("[INFO] Extracting faces...")
+    if detect_size and max(h, w) > detect_size:
+        scale = detect_size / float(max(h, w))
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        det_frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
 
-    unique_hashes = []
-    results_list = []
-    unique_count = 0
-    frame_id = 0
+    # ---------------------------------------------------------
+    # FIX 1: Rotate portrait videos → normal landscape
+    # (only the small detector copy is rotated; crops are mapped back)
+    # ---------------------------------------------------------
+    frame_rot = 0
+    if h > w:  # portrait
+        det_frame = cv2.rotate(det_frame, cv2.ROTATE_90_CLOCKWISE)
+        frame_rot = 90
 
-    while True:
+    return frame, det_frame, frame_rot, scale
 
-        ret, frame = cap.read()
-        if not ret:
-            break
 
-        frame_id += 1
-        if frame_id % frame_skip != 0:
-            continue
+# ---------------------------------------------------------
+# HELPER — run YOLO on a batch of frames in one call
+# ---------------------------------------------------------
+def _detect_batch(frames, scales=None, imgsz=None):
+    """
+    Returns one (boxes, confs, keypoints) tuple per input frame, in order.
+    keypoints is (N x 5 x 2) for landmark face models, else None.
+    Coordinates are divided by the frame's scale, i.e. mapped back to
+    full resolution (in the rotated/landscape frame).
+    """
+    scales = scales or [1.0] * len(frames)
+    kwargs = {"imgsz": imgsz} if imgsz else {}
+    try:
+        model = get_yolo()
+        t0 = time.perf_counter()
+        results = model(frames, verbose=False, **kwargs)
+        metrics.observe("yolo", time.perf_counter() - t0, len(frames))
+    except Exception as e:
+        log.error("YOLO failed: %s", e)
+        return [([], [], None) for _ in frames]
+
+    detections = []
+    for res, scale in zip(results, scales):
+        kpts = None
+        if len(res.boxes):
+            boxes = (res.boxes.xyxy.cpu().numpy() / scale).astype(int)
+            confs = res.boxes.conf.cpu().numpy()
+            if getattr(res, "keypoints", None) is not None:
+                kpts = res.keypoints.xy.cpu().numpy() / scale
+        else:
+            boxes, confs = [], []
+        detections.append((boxes, confs, kpts))
+
+    return detections
 
-        frame = _force_bgr_uint8(frame)
-        if frame is None:
-            continue
 
-        # ---------------------------------------------------------
-        # FIX 1: Rotate portrait videos → normal landscape
-        # ---------------------------------------------------------
-        try:
-            h, w = frame.shape[:2]
-            if h > w:  # portrait
-                frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-        except:
-            pass
+# ---------------------------------------------------------
+# HELPER — which way is up?
+# ---------------------------------------------------------
+def _upright_rotation(kpts, frame_rot):
+    """
+    Clockwise rotation (0/90/180/270) that makes the face in a crop upright.
 
-        # ---------------------------------------------------------
-        # YOLO Face Detection
-        # ---------------------------------------------------------
+    With landmarks (left eye, right eye, ...) the eye line gives the roll
+    directly. Otherwise fall back to undoing the portrait→landscape turn.
+    """
+    if kpts is not None and len(kpts) >= 2:
+        (lx, ly), (rx, ry) = kpts[0], kpts[1]
+        if (lx or ly) and (rx or ry):
+            angle = math.degrees(math.atan2(ry - ly, rx - lx))
+            return (-int(round(angle / 90.0)) * 90) % 360
+
+    return (360 - frame_rot) % 360
+
+
+# ---------------------------------------------------------
+# HELPER — padded, resized RGB crop for one box
+# ---------------------------------------------------------
+def _crop_face(frame, box, resize_dim, frame_rot=0):
+    """
+    Returns (face_rgb, face_location) — face_location is the detector box
+    inside the resized crop as (top, right, bottom, left), the layout
+    face_recognition expects for known_face_locations.
+
+    box is in landscape coordinates. For portrait input (frame_rot=90)
+    the matching region is cut from the unrotated full-resolution frame
+    and only the crop is rotated — pixel-identical to cropping a rotated
+    frame, without rotating the whole frame.
+    """
+    x1, y1, x2, y2 = box
+    fh, fw = frame.shape[:2]
+    W, H = (fh, fw) if frame_rot == 90 else (fw, fh)
+
+    # Expand box slightly
+    pad = 0.20
+    bw = x2 - x1
+    bh = y2 - y1
+    x1e = max(0, int(x1 - bw * pad))
+    y1e = max(0, int(y1 - bh * pad))
+    x2e = min(W, int(x2 + bw * pad))
+    y2e = min(H, int(y2 + bh * pad))
+
+    if x2e <= x1e or y2e <= y1e:
+        return None, None
+
+    if frame_rot == 90:
+        crop = frame[fh - x2e:fh - x1e, y1e:y2e]
+        crop = cv2.rotate(crop, cv2.ROTATE_90_CLOCKWISE)
+    else:
+        crop = frame[y1e:y2e, x1e:x2e]
+
+    if crop is None or crop.size == 0:
+        return None, None
+
+    # Face box in resized-crop coordinates
+    sx = resize_dim[0] / float(x2e - x1e)
+    sy = resize_dim[1] / float(y2e - y1e)
+    face_location = (
+        max(0, int(round((y1 - y1e) * sy))),
+        min(resize_dim[0], int(round((x2 - x1e) * sx))),
+        min(resize_dim[1], int(round((y2 - y1e) * sy))),
+        max(0, int(round((x1 - x1e) * sx))),
+    )
+
+    # Resize clean crop (resize first: colour-convert 400x400, not the raw crop)
+    face = cv2.resize(crop, resize_dim, interpolation=cv2.INTER_AREA)
+    face_rgb = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
+    return face_rgb, face_location
+
+
+# ---------------------------------------------------------
+# PIPELINE — bounded queues between threads
+# ---------------------------------------------------------
+_END = object()  # end-of-stream marker passed down the queues
+
+
+class _Failed:
+    """End-of-stream marker for a source that raised; re-raised by the consumer."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up once `stop` is set (avoids deadlock)."""
+    while not stop.is_set():
         try:
-            results = yolo(frame, verbose=False)
-        except Exception as e:
-            print("[YOLO ERROR]", e)
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
             continue
+    return False
 
-        boxes = results[0].boxes.xyxy.cpu().numpy().astype(int) if len(results[0].boxes) else []
-        confs = results[0].boxes.conf.cpu().numpy() if len(results[0].boxes) else []
 
-        for (box, conf) in zip(boxes, confs):
+def _number_frames(frames, wants):
+    """Plain frame iterable → (frame_id, frame), dropping unwanted ids."""
+    for frame_id, frame in enumerate(frames, start=1):
+        if wants(frame_id):
+            yield frame_id, frame
 
-            if conf < 0.55:
-                continue
 
-            x1, y1, x2, y2 = box
+def _decode_stage(frames, sampler, detect_size, out_q, stop):
+    """Decoder thread: (frame_id, frame) → sample → normalise frames."""
+    source = iter(frames)
+    end = _END
+    try:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            item = next(source, None)
+            if item is None:
+                break
+            metrics.observe("decode", time.perf_counter() - t0)
 
-            # Expand box slightly
-            pad = 0.20
-            bw = x2 - x1
-            bh = y2 - y1
-            x1e = max(0, int(x1 - bw * pad))
-            y1e = max(0, int(y1 - bh * pad))
-            x2e = min(frame.shape[1], int(x2 + bw * pad))
-            y2e = min(frame.shape[0], int(y2 + bh * pad))
+            frame_id, frame = item
 
-            crop = frame[y1e:y2e, x1e:x2e]
-            if crop is None or crop.size == 0:
+            if not sampler.should_detect(frame_id, frame):
                 continue
 
-            # Resize clean crop
-            face_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
-            face_rgb = cv2.resize(face_rgb, resize_dim, interpolation=cv2.INTER_AREA)
+            prepared = _prepare_frame(frame, detect_size)
+            if prepared is None:
+                continue
 
-            # ---------------------------------------------------------
-            # FIX 2: Better dedup threshold (was 4 → now **12**)
-            # ---------------------------------------------------------
+            if not _put(out_q, (frame_id,) + prepared, stop):
+                break
+    except Exception as e:
+        # e.g. a streamed upload that stalled or was aborted
+        log.error("Decoding failed: %s", e)
+        end = _Failed(e)
+    finally:
+        if hasattr(frames, "close"):
+            frames.close()
+        _put(out_q, end, stop)
+
+
+def _detect_stage(in_q, out_q, batch_size, imgsz, stop):
+    """Detection thread: gather frames into batches → YOLO."""
+    batch = []
+    ended = False
+    end = _END
+
+    try:
+        while not ended and not stop.is_set():
             try:
-                hsh = get_hash(face_rgb)
-            except:
+                item = in_q.get(timeout=0.1)
+            except queue.Empty:
                 continue
+            metrics.QUEUE_DEPTH.set(in_q.qsize(), queue="frames")
+
+            if item is _END or isinstance(item, _Failed):
+                ended = True
+                end = item
+            else:
+                batch.append(item)
+                if len(batch) < batch_size:
+                    continue
+
+            if batch:
+                detections = _detect_batch([b[2] for b in batch],
+                                           [b[4] for b in batch], imgsz)
+                for item, det in zip(batch, detections):
+                    if not _put(out_q, (item, det), stop):
+                        return
+                batch = []
+    except Exception as e:
+        # e.g. YOLO failing to load or run: the consumer re-raises it
+        log.error("Detection failed: %s", e)
+        end = _Failed(e)
+    finally:
+        _put(out_q, end, stop)
+
+
+# ---------------------------------------------------------
+# PIPELINE — frames in, face dicts out
+# ---------------------------------------------------------
+def _make_sampler(sampling, frame_skip, fps, detect_budget):
+    if sampling == "adaptive":
+        return AdaptiveSampler(fps=fps, budget_per_minute=detect_budget)
+    return FixedSampler(frame_skip)
+
+
+def _open_video(video_path, opts, start=0, end=None):
+    """Returns (frames, sampler) for one video file or segment, or (None, None)."""
+    sampler = _make_sampler(opts["sampling"], opts["frame_skip"],
+                            opts["fps"], opts["detect_budget"])
+    frames, info = open_frames(video_path, sampler.wants_frame,
+                               mode=opts["decode_mode"], stride=opts["frame_skip"],
+                               scale=opts["decode_scale"], start=start, end=end)
+    if frames is None:
+        return None, None
+    if info["mode"] != "grab" and opts["sampling"] != "adaptive":
+        # seek/keyframe sources already pick the frames to look at
+        sampler = FixedSampler(1)
+    return frames, sampler
+
+
+def _iter_faces(frames, sampler, opts, on_frame=None):
+    """
+    Runs decode → detect → crop over (frame_id, frame) pairs and yields
+    face dicts in frame order: every confident detection, or with
+    tracking the best crop of each finished track. on_frame(frame_id) is
+    called after each detected frame. Closing the generator stops the
+    worker threads. An exception raised by the frame source (e.g. a
+    stalled streamed upload) or the detector is re-raised here after the
+    frames before it have been processed.
+    """
+    resize_dim = opts["resize_dim"]
+    detect_size = opts["detect_size"]
+    batch_size = max(1, int(opts["batch_size"]))
+    imgsz = int(math.ceil(detect_size / 32.0)) * 32 if detect_size else None
+    frame_q = queue.Queue(maxsize=max(1, opts["queue_size"]))
+    det_q = queue.Queue(maxsize=max(1, opts["queue_size"]))
+    stop = threading.Event()
+
+    workers = [
+        threading.Thread(target=metrics.bind(_decode_stage),
+                         args=(frames, sampler, detect_size, frame_q, stop), daemon=True),
+        threading.Thread(target=metrics.bind(_detect_stage),
+                         args=(frame_q, det_q, batch_size, imgsz, stop), daemon=True),
+    ]
+    for t in workers:
+        t.start()
+
+    tracker = FaceTracker(max_age=opts["track_max_age"]) if opts["track"] else None
+
+    def track_faces(tracks):
+        for t in tracks:
+            yield dict(t.best, track_hits=t.hits,
+                       first_frame=t.first_frame, last_frame=t.last_frame)
+
+    try:
+        while True:
+
+            item = det_q.get()
+            metrics.QUEUE_DEPTH.set(det_q.qsize(), queue="detections")
+            if isinstance(item, _Failed):
+                raise item.error
+            if item is _END:
+                # close every open track → one crop per person
+                if tracker:
+                    yield from track_faces(tracker.flush())
+                break
+
+            (frame_id, frame, _, frame_rot, _), (boxes, confs, kpts) = item
+            candidates = []
+
+            for i, (box, conf) in enumerate(zip(boxes, confs)):
+
+                if conf < 0.55:
+                    continue
+
+                t0 = time.perf_counter()
+                face_rgb, face_location = _crop_face(frame, box, resize_dim, frame_rot)
+                metrics.observe("crop", time.perf_counter() - t0)
+                if face_rgb is None:
+                    continue
+
+                face_kpts = kpts[i] if kpts is not None else None
+                face = {
+                    "face_rgb": face_rgb,
+                    "frame_id": frame_id,
+                    "box": [int(v) for v in box],
+                    "conf": float(conf),
+                    "face_location": list(face_location),
+                    "rotation": _upright_rotation(face_kpts, frame_rot),
+                }
+
+                if tracker:
+                    quality = crop_quality(face_rgb, box, float(conf), face_kpts)
+                    candidates.append((box, quality, face))
+                else:
+                    yield face
+
+            if tracker:
+                yield from track_faces(tracker.update(frame_id, candidates))
+
+            if on_frame:
+                on_frame(frame_id)
+    finally:
+        stop.set()
+        for t in workers:
+            t.join()
+
+
+# ---------------------------------------------------------
+# SHARDING — one process per time segment
+# ---------------------------------------------------------
+# Segments shorter than this are not worth a process (model load, seek)
+MIN_SHARD_FRAMES = 300
+
+
+def _shard_ranges(frames_total, shards):
+    """Split 0..frames_total into `shards` contiguous (start, end) ranges."""
+    shards = max(1, min(int(shards), frames_total // MIN_SHARD_FRAMES))
+    bounds = [round(i * frames_total / shards) for i in range(shards + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
 
-            if any(abs(hsh - u) < 12 for u in unique_hashes):
-                continue  # too similar → duplicate
+def _init_shard_worker(threads):
+    # N processes × all-core torch/OpenCV pools would oversubscribe the CPU
+    import torch
+    torch.set_num_threads(threads)
+    cv2.setNumThreads(threads)
 
-            unique_hashes.append(hsh)
 
-            # Save face
-            save_path = os.path.join(output_dir, f"face_{unique_count:04d}.jpg")
-            cv2.imwrite(save_path, cv2.cvtColor(face_rgb, cv2.COLOR_RGB2BGR))
+def _detect_segment(video_path, start, end, opts):
+    """
+    Worker entry point: faces of frames start+1 .. end, each with its
+    phash under "hash". Near-duplicates within the segment are dropped
+    here so fewer crops cross the process boundary; the parent repeats
+    the check across segments.
+    """
+    frames, sampler = _open_video(video_path, opts, start, end)
+    if frames is None:
+        return []
+
+    seen = HashIndex()
+    faces = []
+    for face in _iter_faces(frames, sampler, opts):
+        try:
+            hsh = get_hash(face["face_rgb"])
+        except:
+            continue
+        if seen.contains_near(hsh, DEDUP_RADIUS):
+            continue
+        seen.add(hsh)
+        face["hash"] = hsh
+        faces.append(face)
+    return faces
+
+
+def _iter_sharded(video_path, ranges, opts, workers, on_segment=None):
+    """Yields faces segment by segment, in video order, as segments finish."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = max(1, min(workers or len(ranges), len(ranges), os.cpu_count() or 1))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    # spawn: forking a process that already holds torch/YOLO state is unsafe
+    pool = ProcessPoolExecutor(max_workers=workers,
+                               mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_shard_worker, initargs=(threads,))
+    finished = False
+    try:
+        futures = [pool.submit(_detect_segment, video_path, start, end, opts)
+                   for start, end in ranges]
+        for (start, end), future in zip(ranges, futures):
+            yield from future.result()
+            if on_segment:
+                on_segment(end)
+        finished = True
+    finally:
+        if finished:
+            pool.shutdown(wait=True)
+        else:
+            # Early exit (face cap reached, caller gone, a segment failed):
+            # drop queued segments and stop the running ones instead of
+            # waiting for them to finish
+            processes = list((pool._processes or {}).values())
+            pool.shutdown(wait=False, cancel_futures=True)
+            for p in processes:
+                p.terminate()
+            for p in processes:
+                p.join()
 
-            results_list.append(save_path)
-            unique_count += 1
-            print(f"[INFO] Saved clean face #{unique_count}")
 
-            if unique_count >= max_unique_faces:
+# ---------------------------------------------------------
+# MAIN DETECTOR
+# ---------------------------------------------------------
+def detect_faces_from_video(
+        video_path,
+        output_dir,
+        max_unique_faces=8,
+        frame_skip=2,
+        resize_dim=(400, 400),
+        batch_size=16,
+        queue_size=64,
+        with_meta=False,
+        progress=None,
+        frames=None,
+        on_face=None,
+        track=True,
+        track_max_age=30,
+        sampling="fixed",
+        detect_budget=None,
+        fps=None,
+        decode_mode="grab",
+        decode_scale=None,
+        time_stride=None,
+        detect_size=640,
+        shards=1,
+        shard_workers=None,
+        crop_store=None
+):
+    """
+    Runs as a three-stage pipeline:
+        decoder thread → detection thread → crop/hash/write (this thread)
+    connected by bounded queues of `queue_size` items, so a slow stage
+    applies backpressure instead of buffering the whole video.
+
+    Sampled frames are sent to YOLO `batch_size` at a time (8–32 is a
+    good range on CPU). Output order is identical to a sequential pass.
+
+    Returns the saved crop paths, or with with_meta=True one dict per crop:
+        img_path, frame_id, box, conf,
+        face_location → detector box inside the crop (top, right, bottom, left)
+        rotation      → clockwise turn that makes the face upright
+    so identification can skip face detection and rotation search.
+
+    progress, if given, is called as
+        progress(frames_processed, frames_total, faces_found)
+    after every detected frame (frames_total is 0 when unknown).
+
+    frames, if given, is used instead of opening video_path: an iterable
+    of BGR frames, or a callable frames(wants) → (frame_id, frame) pairs
+    that skips the frames wants(frame_id) rejects without retrieving them
+    (e.g. stream_ingest.iter_growing_video for uploads that are still
+    arriving). on_face(result) is called as soon as each crop is
+    saved, with the same item that ends up in the returned list.
+
+    With track=True (default) detections are linked across frames by an
+    IoU tracker (see face_tracker.FaceTracker) and only the best crop of
+    each track — sharpest, largest, most frontal — is hashed and saved,
+    once the track has been unseen for track_max_age frames. Meta dicts
+    then also carry track_hits, first_frame and last_frame. The phash
+    check still merges a person who leaves and re-enters the frame.
+    track=False saves every non-duplicate detection as before.
+
+    sampling="fixed" runs YOLO on every frame_skip-th frame. "adaptive"
+    (see frame_sampler.AdaptiveSampler) skips static stretches, samples
+    densely around scene cuts and, with detect_budget, caps detector calls
+    per video minute. fps defaults to the container's frame rate.
+
+    decode_mode (see video_decode.open_frames):
+        "grab"      → skipped frames are grabbed but never retrieved
+        "seek"      → jump straight to every frame_skip-th frame
+        "keyframes" → decode I-frames only (ffmpeg)
+    time_stride (seconds) overrides frame_skip with a time-based stride.
+    decode_scale (<1 factor or >1 max width) shrinks frames right after
+    decoding; crops then come from the smaller frame.
+
+    detect_size is the detector input size: YOLO runs on a copy whose long
+    side is at most detect_size, boxes are scaled back and crops are cut
+    from the full-resolution frame. None detects on the full frame.
+
+    shards > 1 splits a video file into that many time segments and runs
+    them in a process pool (shard_workers processes, default one per
+    shard up to the CPU count). Each worker loads its own YOLO model and
+    seeks to its segment; crops are merged in segment order with one
+    global phash dedup, so numbering stays stable. Tracks end at segment
+    boundaries (the dedup merges most of the splits). Short videos, unknown
+    lengths and `frames` iterables always run in-process.
+
+    crop_store (see crop_store.CropStore), if given, receives each RGB
+    crop under its img_path instead of a JPEG being written; the file is
+    created later by crop_store.ensure_file() when actually needed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    frames_total = 0
+    if frames is None:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            log.error("Cannot open video: %s", video_path)
+            return []
+        frames_total = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0))
+        fps = fps or cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+
+    if time_stride:
+        frame_skip = max(1, int(round(time_stride * (fps or 30.0))))
+
+    opts = {
+        "frame_skip": frame_skip, "resize_dim": tuple(resize_dim),
+        "batch_size": batch_size, "queue_size": queue_size,
+        "track": track, "track_max_age": track_max_age,
+        "sampling": sampling, "detect_budget": detect_budget, "fps": fps,
+        "decode_mode": decode_mode, "decode_scale": decode_scale,
+        "detect_size": detect_size,
+    }
+
+    unique_hashes = HashIndex()
+    results_list = []
+    unique_count = 0
+    last_frame = 0
+
+    def emit(face):
+        """hash → dedup → save one crop; returns False once the cap is hit."""
+        nonlocal unique_count
+        face_rgb = face["face_rgb"]
+
+        # ---------------------------------------------------------
+        # FIX 2: Better dedup threshold (was 4 → now **12**)
+        # ---------------------------------------------------------
+        hsh = face.pop("hash", None)
+        if hsh is None:
+            try:
+                with metrics.timer("hash"):
+                    hsh = get_hash(face_rgb)
+            except:
+                return True
+
+        if unique_hashes.contains_near(hsh, DEDUP_RADIUS):
+            return True  # too similar → duplicate
+
+        unique_hashes.add(hsh)
+
+        # Save face (or hand it over in memory, JPEG written on demand)
+        save_path = os.path.join(output_dir, f"face_{unique_count:04d}.jpg")
+        meta = {k: v for k, v in face.items() if k != "face_rgb"}
+        meta["img_path"] = save_path
+
+        if crop_store is not None:
+            crop_store.put(save_path, face_rgb, meta)
+        else:
+            with metrics.timer("write"):
+                cv2.imwrite(save_path, cv2.cvtColor(face_rgb, cv2.COLOR_RGB2BGR))
+
+        result = meta if with_meta else save_path
+
+        results_list.append(result)
+        unique_count += 1
+        if on_face:
+            on_face(result)
+        log.debug("Saved clean face #%d", unique_count)
+
+        return unique_count < max_unique_faces
+
+    def on_frame(frame_id):
+        nonlocal last_frame
+        last_frame = frame_id
+        if progress:
+            progress(last_frame, frames_total, unique_count)
+
+    ranges = []
+    if frames is None and shards and shards > 1 and frames_total:
+        ranges = _shard_ranges(frames_total, shards)
+
+    if len(ranges) > 1:
+        log.info("Extracting faces in %d segments...", len(ranges))
+        faces = _iter_sharded(video_path, ranges, opts, shard_workers, on_frame)
+    else:
+        if frames is None:
+            frames, sampler = _open_video(video_path, opts)
+            if frames is None:
+                log.error("Cannot open video: %s", video_path)
+                return []
+        else:
+            sampler = _make_sampler(sampling, frame_skip, fps, detect_budget)
+            if callable(frames):
+                frames = frames(sampler.wants_frame)
+            else:
+                frames = _number_frames(frames, sampler.wants_frame)
+
+        log.info("Extracting faces...")
+        faces = _iter_faces(frames, sampler, opts, on_frame)
+
+    try:
+        for face in faces:
+            if not emit(face):
                 break
+    finally:
+        faces.close()
 
-        if unique_count >= max_unique_faces:
-            break
+    if progress:
+        progress(frames_total or last_frame, frames_total, unique_count)
 
-    cap.release()
-    print("[INFO] Total saved:", unique_count)
+    log.info("Total saved: %d", unique_count)
     return results_list
@@ -1,10 +1,15 @@
 # backend/utils/embeddings.py
 
 import os
+import logging
 import numpy as np
-import face_recognition
 from typing import Tuple, Dict
 
+from backend.utils.encoding_service import _face_recognition, get_service
+from backend.utils.matcher import as_matcher
+
+log = logging.getLogger(__name__)
+
 # Correct absolute path to embeddings folder
 EMBEDDINGS_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "models", "embeddings")
@@ -17,6 +22,8 @@ def get_face_encoding(face_path: str):
     if not os.path.exists(face_path):
         raise ValueError(f"File not found: {face_path}")
 
+    # dlib is imported on first use: matching alone must not need it
+    face_recognition = _face_recognition()
     try:
         img = face_recognition.load_image_file(face_path)
     except Exception as e:
@@ -30,6 +37,14 @@ def get_face_encoding(face_path: str):
     return encs[0]
 
 
+# -----------------------------------------------------------
+# Many face images → encodings (None where no face), in order
+# Runs on the shared encoding process pool
+# -----------------------------------------------------------
+def get_face_encodings(face_paths):
+    return get_service().encode([{"path": p} for p in face_paths])
+
+
 # -----------------------------------------------------------
 # Load all embeddings (.npy files)
 # -----------------------------------------------------------
@@ -37,7 +52,7 @@ def load_known_embeddings() -> Dict[str, np.ndarray]:
     known = {}
 
     if not os.path.isdir(EMBEDDINGS_DIR):
-        print(f"[WARN] Embeddings folder not found: {EMBEDDINGS_DIR}")
+        log.warning("Embeddings folder not found: %s", EMBEDDINGS_DIR)
         return known
 
     for fname in os.listdir(EMBEDDINGS_DIR):
@@ -50,9 +65,9 @@ def load_known_embeddings() -> Dict[str, np.ndarray]:
             arr = np.load(full_path, allow_pickle=False)
             name = os.path.splitext(fname)[0]  # PersonA_embed → PersonA_embed
             known[name] = arr
-            print(f"[INFO] Loaded embeddings for {name}: shape={arr.shape}")
+            log.info("Loaded embeddings for %s: shape=%s", name, arr.shape)
         except Exception as e:
-            print(f"[WARN] Could not load {full_path}: {e}")
+            log.warning("Could not load %s: %s", full_path, e)
 
     return known
 
@@ -66,30 +81,16 @@ def compare_embeddings(
         known_dict,
         threshold: float = 0.62  # Relaxed for group videos
 ) -> Tuple[str, float]:
+    """
+    known_dict may be a person → vectors dict or a prebuilt GalleryMatcher
+    (reuse the matcher when comparing many embeddings).
+    """
 
     if unknown_embedding is None or len(known_dict) == 0:
         return "Unknown", float("inf")
 
-    best_name = "Unknown"
-    best_dist = float("inf")
-
-    for name, vectors in known_dict.items():
-
-        try:
-            distances = face_recognition.face_distance(vectors, unknown_embedding)
-        except Exception:
-            continue
-
-        if len(distances) == 0:
-            continue
-
-        person_min = float(np.min(distances))
-
-        if person_min < best_dist:
-            best_dist = person_min
-            best_name = name
-
-    if best_dist > threshold:
-        return "Unknown", best_dist
+    matcher = as_matcher(known_dict)
+    if len(matcher) == 0:
+        return "Unknown", float("inf")
 
-    return best_name, best_dist
+    return matcher.match_one(unknown_embedding, threshold)
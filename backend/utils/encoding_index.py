@@ -0,0 +1,328 @@
+# backend/utils/encoding_index.py
+
+import os
+import logging
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+import cv2
+import numpy as np
+
+from backend.utils.encoding_service import encode_detected, get_service
+
+try:
+    import fcntl
+except ImportError:       # Windows → lockfile fallback
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+
+KNOWN_BASE = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "known_faces"
+))
+
+INDEX_DIR = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "models", "known_faces_index"
+))
+
+MANIFEST_NAME = "index.json"
+LOCK_NAME = ".lock"
+IMAGE_EXTS = (".jpg", ".png", ".jpeg")
+ENC_DIM = 128
+
+
+# ------------------------------------------------------------------------
+# Encode one gallery image (HOG detect → dlib encode)
+# ------------------------------------------------------------------------
+def encode_image(img_path):
+    img = cv2.imread(img_path)
+    if img is None:
+        return None
+    return encode_detected(img)
+
+
+# ------------------------------------------------------------------------
+# Scan known_faces/<person>/<image>
+# ------------------------------------------------------------------------
+def scan_gallery(base_dir=KNOWN_BASE):
+    """
+    Returns sorted list of (rel_path, person, mtime_ns, size).
+    Sorting by (person, path) keeps each person's rows contiguous.
+    """
+    files = []
+    if not os.path.isdir(base_dir):
+        return files
+
+    for person in os.listdir(base_dir):
+        folder = os.path.join(base_dir, person)
+        if not os.path.isdir(folder):
+            continue
+
+        for f in os.listdir(folder):
+            if not f.lower().endswith(IMAGE_EXTS):
+                continue
+
+            st = os.stat(os.path.join(folder, f))
+            rel = f"{person}/{f}"
+            files.append((rel, person, st.st_mtime_ns, st.st_size))
+
+    files.sort(key=lambda x: (x[1], x[0]))
+    return files
+
+
+def gallery_version(files):
+    """
+    Short fingerprint of a scan_gallery() listing. It changes whenever an
+    image is added, removed or modified, and is stable across restarts.
+    """
+    h = hashlib.sha1()
+    for rel, _, mtime, size in files:
+        h.update(f"{rel}\0{mtime}\0{size}\n".encode())
+    return h.hexdigest()[:16]
+
+
+def entry_files(entries):
+    """Index entries → the scan_gallery() tuples they were built from."""
+    return [(e["path"], e["person"], e["mtime_ns"], e["size"]) for e in entries]
+
+
+# ------------------------------------------------------------------------
+# Read the on-disk index (memory-mapped, shared by all workers)
+# ------------------------------------------------------------------------
+def load_index(index_dir=INDEX_DIR):
+    """
+    Returns (entries, encodings) or (None, None) if no valid index exists.
+
+    entries   → list of dicts: path, person, mtime_ns, size, row
+                (row = -1 when the image has no detectable face)
+    encodings → read-only np.memmap of shape (N x 128), float32
+    """
+    manifest_path = os.path.join(index_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None, None
+
+    # A writer may swap the manifest and drop the generation we just read
+    # about between our two reads → read the (newer) manifest once more.
+    for attempt in range(2):
+        try:
+            manifest = _read_manifest(index_dir)
+            entries = manifest["entries"]
+            enc_path = os.path.join(index_dir, manifest["encodings_file"])
+
+            if manifest.get("count", 0):
+                encodings = np.load(enc_path, mmap_mode="r")
+            else:
+                encodings = np.zeros((0, ENC_DIM), dtype=np.float32)
+
+            if encodings.shape != (manifest.get("count", 0), ENC_DIM):
+                raise ValueError(f"shape mismatch {encodings.shape}")
+            return entries, encodings
+        except FileNotFoundError as e:
+            if attempt == 0:
+                continue
+            log.warning("Ignoring unreadable index: %s", e)
+        except Exception as e:
+            log.warning("Ignoring unreadable index: %s", e)
+            break
+
+    return None, None
+
+
+def _read_manifest(index_dir):
+    with open(os.path.join(index_dir, MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+# ------------------------------------------------------------------------
+# One writer at a time across processes (uvicorn workers, encoder pool)
+# ------------------------------------------------------------------------
+@contextmanager
+def _index_lock(index_dir, timeout=600.0, stale=900.0):
+    """
+    Exclusive lock on index_dir: flock where available, else an O_EXCL
+    lockfile (removed on exit; taken over if older than `stale` seconds).
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    path = os.path.join(index_dir, LOCK_NAME)
+
+    if fcntl is not None:
+        with open(path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return
+
+    deadline = time.time() + timeout
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Index lock busy: {path}")
+            time.sleep(0.1)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# ------------------------------------------------------------------------
+# Write a new index generation atomically (caller holds _index_lock)
+# ------------------------------------------------------------------------
+def _generation(name):
+    """encodings-<gen>.npy → gen, or -1 for foreign / pre-numbering names."""
+    try:
+        return int(name[len("encodings-"):-len(".npy")])
+    except ValueError:
+        return -1
+
+
+def _write_index(index_dir, entries, enc_rows):
+    os.makedirs(index_dir, exist_ok=True)
+
+    previous = None
+    try:
+        previous = _read_manifest(index_dir)
+    except (OSError, ValueError):
+        pass
+
+    gen = (previous or {}).get("generation", 0) + 1
+    enc_name = f"encodings-{gen:08d}.npy"
+
+    if enc_rows:
+        arr = np.ascontiguousarray(np.vstack(enc_rows), dtype=np.float32)
+        np.save(os.path.join(index_dir, enc_name), arr)
+
+    manifest = {
+        "version": 1,
+        "generation": gen,
+        "encodings_file": enc_name,
+        "count": len(enc_rows),
+        "entries": entries,
+    }
+
+    tmp = os.path.join(index_dir, f"{MANIFEST_NAME}.{gen}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(index_dir, MANIFEST_NAME))
+
+    # Drop generations older than the previous one. The previous stays for
+    # readers that have just read its manifest; workers that still map an
+    # older file keep a valid view on POSIX (on Windows it stays locked).
+    keep = {enc_name, (previous or {}).get("encodings_file")}
+    for f in os.listdir(index_dir):
+        if f.startswith("encodings-") and f.endswith(".npy") and f not in keep \
+                and _generation(f) < gen - 1:
+            try:
+                os.remove(os.path.join(index_dir, f))
+            except OSError:
+                pass
+
+
+# ------------------------------------------------------------------------
+# Build / refresh: only new or changed images are re-encoded
+# ------------------------------------------------------------------------
+def update_index(base_dir=KNOWN_BASE, index_dir=INDEX_DIR, service=None):
+    """
+    Brings the index in line with `base_dir` and returns (entries, encodings).
+    Unchanged files (same path, mtime, size) reuse their stored encoding;
+    the rest are encoded in one batch on the encoding process pool.
+
+    Rebuilds are serialised across processes by a lock in index_dir; a
+    process that waited re-reads the index and usually finds it current.
+    """
+    files = scan_gallery(base_dir)
+    old_entries, old_encs = load_index(index_dir)
+    if old_entries is not None and _matches(files, old_entries):
+        return old_entries, old_encs
+
+    with _index_lock(index_dir):
+        return _rebuild(base_dir, index_dir, service)
+
+
+def _matches(files, entries):
+    current = {(rel, mtime, size) for rel, _, mtime, size in files}
+    return current == {(e["path"], e["mtime_ns"], e["size"]) for e in entries}
+
+
+def _rebuild(base_dir, index_dir, service):
+    # Another process may have written the index while we waited; rescan
+    # too, so a stale listing never replaces a newer index
+    files = scan_gallery(base_dir)
+    old_entries, old_encs = load_index(index_dir)
+    if old_entries is not None and _matches(files, old_entries):
+        return old_entries, old_encs
+
+    previous = {}
+    if old_entries is not None:
+        for e in old_entries:
+            previous[e["path"]] = e
+
+    changed = []
+    for rel, _, mtime, size in files:
+        old = previous.get(rel)
+        if not (old and old["mtime_ns"] == mtime and old["size"] == size):
+            changed.append(rel)
+
+    service = service or get_service()
+    fresh = service.encode([{"path": os.path.join(base_dir, *rel.split("/"))}
+                            for rel in changed])
+    fresh = dict(zip(changed, fresh))
+
+    entries = []
+    enc_rows = []
+
+    for rel, person, mtime, size in files:
+        if rel in fresh:
+            enc = fresh[rel]
+        else:
+            old = previous[rel]
+            enc = old_encs[old["row"]] if old["row"] >= 0 else None
+
+        row = -1
+        if enc is not None:
+            row = len(enc_rows)
+            enc_rows.append(np.asarray(enc, dtype=np.float32))
+
+        entries.append({
+            "path": rel,
+            "person": person,
+            "mtime_ns": mtime,
+            "size": size,
+            "row": row,
+        })
+
+    _write_index(index_dir, entries, enc_rows)
+    log.info("Re-encoded %d image(s), %d encodings total.", len(changed), len(enc_rows))
+
+    return load_index(index_dir)
+
+
+# ------------------------------------------------------------------------
+# person → (k x 128) view into the shared encodings array
+# ------------------------------------------------------------------------
+def group_by_person(entries, encodings):
+    rows = {}
+    for e in entries:
+        if e["row"] >= 0:
+            rows.setdefault(e["person"], []).append(e["row"])
+
+    # rows per person are contiguous (see scan_gallery) → slices, not copies
+    return {
+        person: encodings[r[0]:r[-1] + 1]
+        for person, r in rows.items()
+    }
@@ -0,0 +1,260 @@
+# backend/utils/encoding_service.py
+
+import os
+import logging
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+# 0/1 → encode in the calling process; default: one worker per core
+ENCODE_WORKERS = int(os.environ.get("ENCODE_WORKERS", str(os.cpu_count() or 1)))
+
+# Batches smaller than this are not worth the pickling round trip
+MIN_PARALLEL = 4
+
+
+# ------------------------------------------------------------------------
+# dlib is imported on first use: the import alone loads its models
+# ------------------------------------------------------------------------
+_fr = None
+
+
+def _face_recognition():
+    global _fr
+    if _fr is None:
+        import face_recognition
+        _fr = face_recognition
+    return _fr
+
+
+def encoder_loaded():
+    return _fr is not None
+
+
+# ------------------------------------------------------------------------
+# Encoders (run inside the worker processes, or inline)
+# ------------------------------------------------------------------------
+_CV2_ROTATE = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+def rotate_location(loc, shape, rotation):
+    """Map a (top, right, bottom, left) box through a clockwise rotation."""
+    top, right, bottom, left = loc
+    h, w = shape[:2]
+
+    if rotation == 90:
+        return left, h - top, right, h - bottom
+    if rotation == 180:
+        return h - bottom, w - left, h - top, w - right
+    if rotation == 270:
+        return w - right, bottom, w - left, top
+    return top, right, bottom, left
+
+
+def _rgb(image, is_rgb):
+    return image if is_rgb else cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def encode_known_face(image, face_location, rotation=0, is_rgb=False):
+    """
+    One dlib encoding pass using the detector's box and orientation
+    (see detect_faces_from_video(with_meta=True)) — no HOG, no rotation search.
+    image is BGR (cv2.imread), or RGB with is_rgb=True (in-memory crops).
+    """
+    rotation = int(rotation or 0) % 360
+    loc = tuple(int(v) for v in face_location)
+
+    if rotation in _CV2_ROTATE:
+        loc = rotate_location(loc, image.shape, rotation)
+        image = cv2.rotate(image, _CV2_ROTATE[rotation])
+
+    rgb = _rgb(image, is_rgb)
+    enc = _face_recognition().face_encodings(rgb, known_face_locations=[loc])
+    if len(enc):
+        return enc[0]
+    return None
+
+
+def encode_detected(image, is_rgb=False):
+    """HOG detect → encode the first face; None if there is no face."""
+    rgb = _rgb(image, is_rgb)
+    face_locs = _face_recognition().face_locations(rgb, model="hog")
+
+    if not face_locs:
+        return None
+
+    enc = _face_recognition().face_encodings(rgb, known_face_locations=face_locs)
+    if len(enc):
+        return enc[0]
+    return None
+
+
+def try_all_rotations(image, is_rgb=False):
+    """Try four rotations to fix sideways faces."""
+    rotations = {
+        "0°": image,
+        "90°": cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE),
+        "180°": cv2.rotate(image, cv2.ROTATE_180),
+        "270°": cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE),
+    }
+
+    for angle, img in rotations.items():
+        enc = encode_detected(img, is_rgb)
+        if enc is not None:
+            log.debug("Face encoded at rotation %s", angle)
+            return enc
+
+    log.debug("No face detected at any rotation.")
+    return None
+
+
+def encode_face(image, face_location=None, rotation=None, is_rgb=False):
+    """Use crop metadata when present, otherwise search all rotations."""
+    if face_location is not None:
+        return encode_known_face(image, face_location, rotation, is_rgb)
+    return try_all_rotations(image, is_rgb)
+
+
+def encode_task(task):
+    """
+    One unit of work. task is a dict with either
+        path  → image file,
+        image → BGR array, or
+        rgb   → RGB array (in-memory crop, see crop_store)
+    plus optional
+        face_location, rotation → single pass (encode_known_face)
+        search_rotations=True   → try_all_rotations
+    and otherwise HOG detection on the image as-is.
+    Returns the 128-d encoding or None.
+    """
+    is_rgb = task.get("rgb") is not None
+    image = task["rgb"] if is_rgb else task.get("image")
+    if image is None:
+        image = cv2.imread(task["path"])
+        if image is None:
+            log.error("Could not load image: %s", task["path"])
+            return None
+
+    try:
+        if task.get("face_location") is not None:
+            return encode_known_face(image, task["face_location"], task.get("rotation"), is_rgb)
+        if task.get("search_rotations"):
+            return try_all_rotations(image, is_rgb)
+        return encode_detected(image, is_rgb)
+    except Exception as e:
+        log.error("Encoding %s failed: %s", task.get("path", "<array>"), e)
+        return None
+
+
+def warm_encoder():
+    """Loads dlib and runs one dummy pass so the first real encode is fast."""
+    blank = np.zeros((150, 150, 3), dtype=np.uint8)
+    _face_recognition().face_encodings(blank, known_face_locations=[(0, 150, 150, 0)])
+    return os.getpid()
+
+
+def _init_worker():
+    cv2.setNumThreads(1)
+    warm_encoder()
+
+
+# ------------------------------------------------------------------------
+# Process pool with warm dlib models
+# ------------------------------------------------------------------------
+class EncodingService:
+    """
+    Encodes batches of images/crops across `max_workers` processes, each
+    with its own warm dlib models (dlib holds the GIL, so threads do not
+    scale). The pool starts on first use and is reused afterwards.
+    Small batches, and max_workers <= 1, run in the calling process.
+    """
+
+    def __init__(self, max_workers=ENCODE_WORKERS, min_parallel=MIN_PARALLEL):
+        self.max_workers = max(1, int(max_workers or 1))
+        self.min_parallel = max(1, int(min_parallel))
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: workers must not inherit torch/YOLO state from the server
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def warm_up(self):
+        """Starts the pool and waits until every worker has its models loaded."""
+        warm_encoder()
+        if self.max_workers > 1:
+            pool = self._get_pool()
+            futures = [pool.submit(warm_encoder) for _ in range(self.max_workers)]
+            for fut in futures:
+                fut.result()
+
+    @property
+    def started(self):
+        return self._pool is not None
+
+    def _inline(self, tasks):
+        return self.max_workers <= 1 or len(tasks) < self.min_parallel
+
+    def encode(self, tasks):
+        """Returns one encoding (or None) per task, in order."""
+        tasks = list(tasks)
+        if self._inline(tasks):
+            return [encode_task(t) for t in tasks]
+
+        chunk = max(1, len(tasks) // (self.max_workers * 4))
+        return list(self._get_pool().map(encode_task, tasks, chunksize=chunk))
+
+    def iter_encode(self, tasks):
+        """Yields (index, encoding or None) as each task finishes."""
+        tasks = list(tasks)
+        if self._inline(tasks):
+            for i, t in enumerate(tasks):
+                yield i, encode_task(t)
+            return
+
+        pool = self._get_pool()
+        futures = {pool.submit(encode_task, t): i for i, t in enumerate(tasks)}
+        try:
+            for fut in as_completed(futures):
+                yield futures[fut], fut.result()
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Process-wide EncodingService shared by gallery builds and identification."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EncodingService()
+            atexit.register(_service.shutdown)
+        return _service
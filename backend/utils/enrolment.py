@@ -0,0 +1,132 @@
+# backend/utils/enrolment.py
+
+import os
+import logging
+import shutil
+import threading
+
+from backend.utils.encoding_index import IMAGE_EXTS, KNOWN_BASE, gallery_version, scan_gallery
+from backend.utils.identify_person import gallery_loaded, get_gallery, reload_gallery
+
+log = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------------
+# Names coming from the API end up in paths → keep them to one component
+# ------------------------------------------------------------------------
+def _safe_name(name, what):
+    name = (name or "").strip()
+    if not name or name != os.path.basename(name) or name.startswith("."):
+        raise ValueError(f"Invalid {what}: {name!r}")
+    return name
+
+
+def _person_dir(person):
+    return os.path.join(KNOWN_BASE, _safe_name(person, "person"))
+
+
+# ------------------------------------------------------------------------
+# Gallery listing / edits (each edit ends in one incremental reload)
+# ------------------------------------------------------------------------
+def list_gallery():
+    snap = get_gallery()
+    people = {}
+    for e in snap.entries:
+        p = people.setdefault(e["person"], {"images": [], "encoded": 0})
+        p["images"].append(os.path.basename(e["path"]))
+        p["encoded"] += e["row"] >= 0
+    return {"version": snap.version, "people": people}
+
+
+def _summary(snap, person, names=None):
+    """Per-image outcome for `person` in the new snapshot."""
+    images = {}
+    for e in snap.entries:
+        name = os.path.basename(e["path"])
+        if e["person"] == person and (names is None or name in names):
+            images[name] = "encoded" if e["row"] >= 0 else "no_face"
+    return {"version": snap.version, "person": person, "images": images}
+
+
+def add_images(person, files):
+    """
+    files → iterable of (filename, readable file object). Saves them under
+    known_faces/<person>/ and reloads; only these images get encoded.
+    """
+    folder = _person_dir(person)
+    os.makedirs(folder, exist_ok=True)
+
+    names = []
+    for filename, fh in files:
+        name = _safe_name(os.path.basename(filename or ""), "file name")
+        if not name.lower().endswith(IMAGE_EXTS):
+            raise ValueError(f"Unsupported image type: {name}")
+
+        with open(os.path.join(folder, name), "wb") as out:
+            shutil.copyfileobj(fh, out)
+        names.append(name)
+
+    return _summary(reload_gallery(), os.path.basename(folder), set(names))
+
+
+def remove_person(person):
+    folder = _person_dir(person)
+    if not os.path.isdir(folder):
+        raise KeyError(person)
+
+    shutil.rmtree(folder)
+    return {"version": reload_gallery().version, "removed": person}
+
+
+def remove_image(person, filename):
+    path = os.path.join(_person_dir(person), _safe_name(filename, "file name"))
+    if not os.path.isfile(path):
+        raise KeyError(f"{person}/{filename}")
+
+    os.remove(path)
+    return {"version": reload_gallery().version, "removed": f"{person}/{filename}"}
+
+
+# ------------------------------------------------------------------------
+# Polling watcher: picks up edits made directly in known_faces/
+# ------------------------------------------------------------------------
+class GalleryWatcher:
+    """
+    Every `interval` seconds stats known_faces/ (no image reads) and
+    reloads when its fingerprint differs from the live snapshot. Edits
+    made through the API are already live and do not reload twice.
+    Nothing happens until the gallery has been loaded once.
+    """
+
+    def __init__(self, interval=5.0, base_dir=KNOWN_BASE):
+        self.interval = interval
+        self.base_dir = base_dir
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="gallery-watch",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """One poll; returns the new snapshot if a reload happened."""
+        if not gallery_loaded():
+            return None
+
+        if gallery_version(scan_gallery(self.base_dir)) == get_gallery().version:
+            return None
+
+        log.info("known_faces changed, reloading")
+        return reload_gallery()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                log.warning("Reload failed: %s", e)
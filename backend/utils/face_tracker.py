@@ -0,0 +1,145 @@
+# backend/utils/face_tracker.py
+
+import cv2
+import numpy as np
+
+
+# ------------------------------------------------------------------------
+# Box helpers (x1, y1, x2, y2)
+# ------------------------------------------------------------------------
+def iou_matrix(a, b):
+    """(len(a) x len(b)) IoU between two lists of xyxy boxes."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+# ------------------------------------------------------------------------
+# Crop quality: sharpness × size × frontalness × confidence
+# ------------------------------------------------------------------------
+def crop_quality(face_rgb, box, conf, kpts=None):
+    gray = cv2.cvtColor(face_rgb, cv2.COLOR_RGB2GRAY)
+    sharp = min(1.0, cv2.Laplacian(gray, cv2.CV_64F).var() / 500.0)
+
+    x1, y1, x2, y2 = box
+    size = min(1.0, np.sqrt(max(0, x2 - x1) * max(0, y2 - y1)) / 160.0)
+
+    # Nose centred between the eyes → frontal; unknown → neutral
+    front = 0.5
+    if kpts is not None and len(kpts) >= 3:
+        (lx, ly), (rx, ry), (nx, ny) = kpts[0], kpts[1], kpts[2]
+        mx, my = (lx + rx) / 2.0, (ly + ry) / 2.0
+        eye_dist = np.hypot(rx - lx, ry - ly)
+        if eye_dist > 1:
+            # yaw shows up as the nose drifting along the eye line
+            along = abs((nx - mx) * (rx - lx) + (ny - my) * (ry - ly)) / eye_dist
+            front = max(0.0, 1.0 - 2.0 * along / eye_dist)
+
+    return float(sharp * size * (0.5 + 0.5 * front) * conf)
+
+
+# ------------------------------------------------------------------------
+# One tracked face
+# ------------------------------------------------------------------------
+class Track:
+    def __init__(self, track_id, frame_id, box, payload, quality):
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)   # per frame, xyxy
+        self.first_frame = frame_id
+        self.last_frame = frame_id
+        self.hits = 1
+        self.best = payload
+        self.best_quality = quality
+
+    def predict(self, frame_id):
+        return self.box + self.velocity * (frame_id - self.last_frame)
+
+    def update(self, frame_id, box, payload, quality, alpha=0.6, beta=0.3):
+        """Alpha-beta filter: a constant-velocity Kalman filter with fixed gains."""
+        dt = max(1, frame_id - self.last_frame)
+        pred = self.predict(frame_id)
+        resid = np.asarray(box, dtype=np.float32) - pred
+
+        self.box = pred + alpha * resid
+        self.velocity = self.velocity + beta * resid / dt
+        self.last_frame = frame_id
+        self.hits += 1
+
+        if quality > self.best_quality:
+            self.best = payload
+            self.best_quality = quality
+
+
+# ------------------------------------------------------------------------
+# IoU association over YOLO boxes
+# ------------------------------------------------------------------------
+class FaceTracker:
+    """
+    Links per-frame detections into tracks and keeps only the best crop
+    of each. update() returns tracks that have ended (not seen for more
+    than max_age frames); flush() ends the rest at end of video.
+
+    iou_threshold → minimum IoU between predicted track box and detection
+    max_age       → frames a track may go unseen before it is closed
+    min_hits      → tracks with fewer detections are dropped as noise
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=30, min_hits=1):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.tracks = []
+        self._next_id = 0
+
+    def update(self, frame_id, detections):
+        """
+        detections → list of (box, quality, payload) for one frame
+        returns    → list of finished Track objects (oldest first)
+        """
+        preds = [t.predict(frame_id) for t in self.tracks]
+        ious = iou_matrix(preds, [d[0] for d in detections])
+
+        # Greedy association, highest IoU first
+        matched_t, matched_d = set(), set()
+        if ious.size:
+            for flat in np.argsort(-ious, axis=None):
+                ti, di = np.unravel_index(flat, ious.shape)
+                if ious[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_t or di in matched_d:
+                    continue
+                box, quality, payload = detections[di]
+                self.tracks[ti].update(frame_id, box, payload, quality)
+                matched_t.add(ti)
+                matched_d.add(di)
+
+        for di, (box, quality, payload) in enumerate(detections):
+            if di not in matched_d:
+                self.tracks.append(Track(self._next_id, frame_id, box, payload, quality))
+                self._next_id += 1
+
+        finished = [t for t in self.tracks if frame_id - t.last_frame > self.max_age]
+        self.tracks = [t for t in self.tracks if frame_id - t.last_frame <= self.max_age]
+        return self._keep(finished)
+
+    def flush(self):
+        finished, self.tracks = self.tracks, []
+        return self._keep(finished)
+
+    def _keep(self, tracks):
+        tracks = [t for t in tracks if t.hits >= self.min_hits]
+        tracks.sort(key=lambda t: (t.first_frame, t.track_id))
+        return tracks
@@ -0,0 +1,137 @@
+# backend/utils/frame_sampler.py
+
+import cv2
+import numpy as np
+
+
+# ------------------------------------------------------------------------
+# Fixed stride (the original behaviour)
+# ------------------------------------------------------------------------
+class FixedSampler:
+    """Detect on every `frame_skip`-th frame."""
+
+    needs_pixels = False
+
+    def __init__(self, frame_skip=2):
+        self.frame_skip = max(1, int(frame_skip))
+
+    def wants_frame(self, frame_id):
+        """False → the decoder may skip this frame without retrieving it."""
+        return frame_id % self.frame_skip == 0
+
+    def should_detect(self, frame_id, frame=None):
+        return self.wants_frame(frame_id)
+
+
+# ------------------------------------------------------------------------
+# Content-driven sampling
+# ------------------------------------------------------------------------
+class AdaptiveSampler:
+    """
+    Decides per frame whether YOLO should run, from cheap signals on a
+    tiny grayscale thumbnail:
+
+      • histogram delta vs. the last detected frame → scene cut: detect now
+        and sample densely (min_gap) for the next `boost_frames` frames
+      • mean absolute pixel difference → motion: detect once `gap` frames
+        have passed; static footage is skipped
+      • keep-alive: never go longer than max_gap frames without detecting
+
+    budget_per_minute caps detector calls per minute of *video* with a
+    token bucket (bursts of up to 10 s worth of calls are allowed, so a
+    scene cut is not starved by the cap).
+
+    Every frame passed to should_detect() must be decoded; probe_stride>1
+    only looks at every n-th frame (the rest are grabbed but never
+    retrieved, see wants_frame).
+    """
+
+    needs_pixels = True
+
+    def __init__(self, fps=30.0, min_gap=1, gap=4, max_gap=30,
+                 motion_threshold=6.0, scene_threshold=0.35, boost_frames=15,
+                 budget_per_minute=None, probe_stride=1, probe_size=(64, 36)):
+        self.fps = float(fps) if fps and fps > 0 else 30.0
+        self.min_gap = max(1, int(min_gap))
+        self.gap = max(self.min_gap, int(gap))
+        self.max_gap = max(self.gap, int(max_gap))
+        self.motion_threshold = motion_threshold
+        self.scene_threshold = scene_threshold
+        self.boost_frames = boost_frames
+        self.probe_stride = max(1, int(probe_stride))
+        self.probe_size = probe_size
+
+        self.budget_per_minute = budget_per_minute
+        self._tokens = self._capacity()
+        self._last_time = 0.0
+
+        self._ref_thumb = None
+        self._ref_hist = None
+        self._last_detect = None
+        self._boost_until = -1
+
+        self.detected = 0
+        self.scene_cuts = 0
+
+    def _capacity(self):
+        if not self.budget_per_minute:
+            return float("inf")
+        return max(1.0, self.budget_per_minute / 6.0)
+
+    def _refill(self, frame_id):
+        if not self.budget_per_minute:
+            return
+        t = frame_id / self.fps
+        self._tokens = min(self._capacity(),
+                           self._tokens + (t - self._last_time) * self.budget_per_minute / 60.0)
+        self._last_time = t
+
+    def wants_frame(self, frame_id):
+        """False → the decoder may skip this frame without retrieving it."""
+        return frame_id % self.probe_stride == 0
+
+    def should_detect(self, frame_id, frame=None):
+        self._refill(frame_id)
+
+        if frame is None or not self.wants_frame(frame_id):
+            return False
+
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, self.probe_size, interpolation=cv2.INTER_AREA)
+        hist = cv2.calcHist([thumb], [0], None, [32], [0, 256])
+        cv2.normalize(hist, hist, alpha=1.0, norm_type=cv2.NORM_L1)
+
+        if self._last_detect is None:
+            return self._take(frame_id, thumb, hist)
+
+        since = frame_id - self._last_detect
+        scene = cv2.compareHist(self._ref_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+
+        if scene > self.scene_threshold:
+            self.scene_cuts += 1
+            self._boost_until = frame_id + self.boost_frames
+            return self._take(frame_id, thumb, hist)
+
+        if frame_id <= self._boost_until and since >= self.min_gap:
+            return self._take(frame_id, thumb, hist)
+
+        if since >= self.max_gap:
+            return self._take(frame_id, thumb, hist)
+
+        if since >= self.gap:
+            motion = float(np.mean(cv2.absdiff(thumb, self._ref_thumb)))
+            if motion > self.motion_threshold:
+                return self._take(frame_id, thumb, hist)
+
+        return False
+
+    def _take(self, frame_id, thumb, hist):
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+
+        self._ref_thumb = thumb
+        self._ref_hist = hist
+        self._last_detect = frame_id
+        self.detected += 1
+        return True
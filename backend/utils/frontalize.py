@@ -1,14 +1,16 @@
 import os
+import logging
+import threading
 import cv2
 import torch
 import numpy as np
-from torchvision import transforms
-from PIL import Image
+
+log = logging.getLogger(__name__)
 
 
 def load_gan_model(model_path):
     if not os.path.exists(model_path):
-        print(f"[WARN] GAN NOT FOUND: {model_path}")
+        log.warning("GAN not found: %s", model_path)
         return None
 
     try:
@@ -16,39 +18,126 @@ def load_gan_model(model_path):
         model.eval()
         return model
     except Exception as e:
-        print("[ERROR] Failed loading GAN:", e)
+        log.error("Failed loading GAN: %s", e)
         return None
 
 
-def frontalize_with_gan_or_fallback(face_image_path, model_path, output_dir):
+def mirror_fallback(batch):
+    """
+    (N, H, W, 3) → left half + its mirror image, for the whole batch at
+    once. A single (H, W, 3) image works too.
+    """
+    batch = np.asarray(batch)
+    w = batch.shape[-2]
+    left = batch[..., :w // 2, :]
+    return np.concatenate([left, left[..., ::-1, :]], axis=-2)
+
 
-    os.makedirs(output_dir, exist_ok=True)
+class FrontalizationEngine:
+    """
+    Keeps the GAN resident and frontalizes many RGB face crops per call:
+    crops of equal size are stacked and run through the model
+    `batch_size` at a time in one torch.no_grad() forward each. Without a
+    model (or if it fails) the batch gets the mirror fallback instead.
+    torch's thread count is left alone: it is process-wide and shared
+    with YOLO.
+    """
 
-    image = Image.open(face_image_path).convert("RGB")
-    tensor = transforms.ToTensor()(image).unsqueeze(0)
+    def __init__(self, model_path, batch_size=16):
+        self.model_path = model_path
+        self.batch_size = max(1, int(batch_size))
+        self._model = None
+        self._loaded = False
+        self._lock = threading.Lock()
 
-    model = load_gan_model(model_path)
-    output = None
+    @property
+    def model(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._model = load_gan_model(self.model_path)
+                    self._loaded = True
+        return self._model
 
-    if model:
+    def _run_model(self, stack):
+        """(N, H, W, 3) uint8 RGB → (N, H', W', 3) uint8 RGB, or None."""
+        model = self.model
+        if model is None:
+            return None
+
+        outputs = []
         try:
             with torch.no_grad():
-                out = model(tensor)
-            output = (out.squeeze(0).permute(1, 2, 0).numpy() * 255).astype(np.uint8)
-            print("[INFO] GAN frontalization success")
+                for i in range(0, len(stack), self.batch_size):
+                    chunk = stack[i:i + self.batch_size]
+                    # same as transforms.ToTensor(): HWC uint8 → CHW float in [0, 1]
+                    tensor = torch.from_numpy(chunk).permute(0, 3, 1, 2).float().div_(255.0)
+                    out = model(tensor).clamp_(0, 1).mul_(255).permute(0, 2, 3, 1)
+                    outputs.append(out.to(torch.uint8).numpy())
         except Exception as e:
-            print("[WARN] GAN failed:", e)
+            log.warning("GAN failed: %s", e)
+            return None
+
+        return np.concatenate(outputs)
+
+    def frontalize(self, faces):
+        """List of RGB uint8 crops → frontalized RGB crops, same order."""
+        results = [None] * len(faces)
+
+        # Only crops of the same size can share a tensor
+        groups = {}
+        for i, face in enumerate(faces):
+            groups.setdefault(face.shape, []).append(i)
+
+        for idx in groups.values():
+            stack = np.stack([faces[i] for i in idx])
+            out = self._run_model(stack)
+            if out is None:
+                out = mirror_fallback(stack)
+                log.debug("Used fallback frontalization (%d faces)", len(idx))
+            else:
+                log.debug("GAN frontalization success (%d faces)", len(idx))
+
+            for i, o in zip(idx, out):
+                results[i] = o
 
-    if output is None:
-        img = cv2.imread(face_image_path)
-        h, w, _ = img.shape
-        left = img[:, :w//2]
-        right = cv2.flip(left, 1)
-        output = np.concatenate([left, right], axis=1)
-        print("[INFO] Used fallback frontalization")
+        return results
 
-    filename = f"frontalized_{os.path.basename(face_image_path)}"
-    out_path = os.path.join(output_dir, filename)
+    def frontalize_files(self, face_image_paths, output_dir):
+        """Reads crops, frontalizes them as a batch, writes frontalized_<name>."""
+        os.makedirs(output_dir, exist_ok=True)
 
-    cv2.imwrite(out_path, output)
-    return out_path
+        paths, faces = [], []
+        for path in face_image_paths:
+            img = cv2.imread(path)
+            if img is None:
+                log.warning("Could not read: %s", path)
+                continue
+            paths.append(path)
+            faces.append(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+
+        out_paths = {}
+        for path, out in zip(paths, self.frontalize(faces)):
+            out_path = os.path.join(output_dir, f"frontalized_{os.path.basename(path)}")
+            cv2.imwrite(out_path, cv2.cvtColor(out, cv2.COLOR_RGB2BGR))
+            out_paths[path] = out_path
+
+        return [out_paths.get(p) for p in face_image_paths]
+
+
+# One resident engine per model file
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(model_path, **kwargs):
+    key = os.path.abspath(model_path)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = FrontalizationEngine(key, **kwargs)
+        return engine
+
+
+def frontalize_with_gan_or_fallback(face_image_path, model_path, output_dir):
+    return get_engine(model_path).frontalize_files([face_image_path], output_dir)[0]
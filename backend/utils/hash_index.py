@@ -0,0 +1,107 @@
+# backend/utils/hash_index.py
+
+import cv2
+import numpy as np
+
+
+# ------------------------------------------------------------------------
+# 64-bit perceptual hash straight from a NumPy crop
+# ------------------------------------------------------------------------
+_DCT_SCALE = np.ones((8, 8), dtype=np.float32)
+_DCT_SCALE[0, :] *= np.sqrt(2.0)
+_DCT_SCALE[:, 0] *= np.sqrt(2.0)
+
+
+def phash64(img):
+    """
+    imagehash.phash(hash_size=8) as a packed int, computed with OpenCV:
+    grayscale + INTER_AREA resize to 32x32, a 2-D DCT and the top-left
+    8x8 vs. its median. cv2.dct is orthonormal; the DC row/column are
+    rescaled to the unnormalised DCT imagehash uses. The resize differs
+    from PIL's LANCZOS, so bits can differ from imagehash; DEDUP_RADIUS
+    is calibrated against these hashes (see tests/test_hash_index.py).
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(np.float32(small))[:8, :8] * _DCT_SCALE
+
+    bits = (low > np.median(low)).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+# ------------------------------------------------------------------------
+# BK-tree: Hamming-radius lookups without scanning every hash
+# ------------------------------------------------------------------------
+class HashIndex:
+    """
+    Stores 64-bit hashes in a BK-tree. A radius-r query only descends into
+    children whose edge distance d satisfies |d - dist(query, node)| <= r,
+    so lookups stay far below a linear scan as the index grows.
+    """
+
+    def __init__(self):
+        self._root = None      # [hash, item, {dist: child}]
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, h, item=None):
+        node = [h, item, {}]
+        self._size += 1
+
+        if self._root is None:
+            self._root = node
+            return
+
+        cur = self._root
+        while True:
+            d = hamming(h, cur[0])
+            child = cur[2].get(d)
+            if child is None:
+                cur[2][d] = node
+                return
+            cur = child
+
+    def search(self, h, radius):
+        """All (distance, hash, item) within `radius` of h."""
+        found = []
+        if self._root is None:
+            return found
+
+        stack = [self._root]
+        while stack:
+            node_h, item, children = stack.pop()
+            d = hamming(h, node_h)
+            if d <= radius:
+                found.append((d, node_h, item))
+
+            lo, hi = d - radius, d + radius
+            for edge, child in children.items():
+                if lo <= edge <= hi:
+                    stack.append(child)
+
+        return found
+
+    def contains_near(self, h, radius):
+        """True as soon as any stored hash is within `radius` (early exit)."""
+        if self._root is None:
+            return False
+
+        stack = [self._root]
+        while stack:
+            node_h, _, children = stack.pop()
+            d = hamming(h, node_h)
+            if d <= radius:
+                return True
+
+            lo, hi = d - radius, d + radius
+            for edge, child in children.items():
+                if lo <= edge <= hi:
+                    stack.append(child)
+
+        return False
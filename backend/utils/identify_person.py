@@ -1,122 +1,303 @@
 # backend/utils/identify_person.py
 
 import os
+import time
+import logging
+import threading
+from collections import namedtuple
+
 import cv2
-import face_recognition
 import numpy as np
 
+from backend.utils import metrics
+from backend.utils.encoding_index import (
+    KNOWN_BASE, entry_files, gallery_version, group_by_person, update_index,
+)
+from backend.utils.encoding_service import encode_face, get_service
+from backend.utils.identity_cache import IdentityCache
+from backend.utils.matcher import GalleryMatcher
 
-KNOWN_BASE = os.path.abspath(os.path.join(
-    os.path.dirname(__file__), "..", "known_faces"
-))
+log = logging.getLogger(__name__)
+log.debug("Known faces folder: %s", KNOWN_BASE)
 
-print("[identify] Known faces folder:", KNOWN_BASE)
+# Matcher index backend: "exact" (default) or "ivf" for very large galleries
+INDEX_BACKEND = os.environ.get("FACE_INDEX", "exact")
 
 
 # ------------------------------------------------------------------------
-# Load encodings from each person's folder
+# Load encodings from the on-disk index (re-encodes only changed images)
 # ------------------------------------------------------------------------
+# Immutable view of the gallery. A reload builds a new one and swaps the
+# module reference; lookups already running keep the snapshot they read.
+#   version  → gallery_version() of the files it was built from
+#   entries  → index entries (row = -1: no face found in that image)
+#   database → person → (k x 128) array
+#   matcher  → GalleryMatcher over the whole gallery
+GallerySnapshot = namedtuple("GallerySnapshot", "version entries database matcher")
+
+
 def load_known_encodings():
-    database = {}
+    """
+    Returns a GallerySnapshot of known_faces/. database and matcher are
+    views into one memory-mapped file, so every worker shares the same
+    pages.
+    """
+    entries, encodings = update_index(KNOWN_BASE)
+    if entries is None:
+        log.warning("Encoding index unavailable.")
+        return GallerySnapshot(None, [], {}, GalleryMatcher.from_dict({}))
+
+    database = group_by_person(entries, encodings)
+    matcher = GalleryMatcher.from_index(entries, encodings, index=INDEX_BACKEND)
+
+    log.info("Loaded encodings for %d people.", len(database))
+    return GallerySnapshot(gallery_version(entry_files(entries)), entries, database, matcher)
 
-    for person in os.listdir(KNOWN_BASE):
-        folder = os.path.join(KNOWN_BASE, person)
-        if not os.path.isdir(folder):
-            continue
 
-        encs = []
-        for f in os.listdir(folder):
-            if not f.lower().endswith((".jpg", ".png", ".jpeg")):
-                continue
+_gallery = None
+_gallery_lock = threading.Lock()
 
-            img_path = os.path.join(folder, f)
-            img = cv2.imread(img_path)
 
-            if img is None:
-                continue
+def get_gallery():
+    """Current GallerySnapshot, built on first use. Never blocks once loaded."""
+    global _gallery
+    if _gallery is None:
+        with _gallery_lock:
+            if _gallery is None:
+                _gallery = load_known_encodings()
+    return _gallery
 
-            rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            face_locs = face_recognition.face_locations(rgb, model="hog")
 
-            if not face_locs:
-                continue
+def gallery_loaded():
+    return _gallery is not None
 
-            enc = face_recognition.face_encodings(rgb, known_face_locations=face_locs)
-            if len(enc):
-                encs.append(enc[0])
 
-        if encs:
-            database[person] = encs
+def reload_gallery():
+    """
+    Brings the snapshot in line with known_faces/: only new or changed
+    images are encoded (see encoding_index.update_index), then the new
+    snapshot replaces the old one in a single assignment.
+    """
+    global _gallery
+    with _gallery_lock:
+        _gallery = load_known_encodings()
+        return _gallery
 
-    print(f"[identify] Loaded encodings for {len(database)} people.")
-    return database
 
+MATCH_THRESHOLD = 0.55  # tweakable
 
-KNOWN_DB = load_known_encodings()
+# crop hash → encoding + match; IDENTITY_CACHE_DB makes it persistent
+IDENTITY_CACHE = IdentityCache(
+    max_items=int(os.environ.get("IDENTITY_CACHE_SIZE", "4096")),
+    db_path=os.environ.get("IDENTITY_CACHE_DB") or None,
+)
+
+
+# ------------------------------------------------------------------------
+# Frontal image for a matched person
+# ------------------------------------------------------------------------
+def frontal_paths_for(name):
+    frontal_path = os.path.join(KNOWN_BASE, name, "frontal.jpg")
+    if os.path.exists(frontal_path):
+        return [frontal_path]
+    return []
 
 
 # ------------------------------------------------------------------------
-# Try encoding with rotations
+# Batch matching: (M x 128) encodings → M (name, score) in one call
 # ------------------------------------------------------------------------
-def try_all_rotations(image):
-    """Try four rotations to fix sideways faces."""
-    rotations = {
-        "0°": image,
-        "90°": cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE),
-        "180°": cv2.rotate(image, cv2.ROTATE_180),
-        "270°": cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE),
-    }
+def match_encodings(encodings, threshold=MATCH_THRESHOLD, snapshot=None):
+    matcher = (snapshot or get_gallery()).matcher
+    if len(matcher) == 0:
+        return [("Unknown", 999.0) for _ in range(len(encodings))]
 
-    for angle, img in rotations.items():
-        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        locs = face_recognition.face_locations(rgb, model="hog")
+    with metrics.timer("match", len(encodings)):
+        return matcher.match(np.asarray(encodings), threshold)
 
-        if locs:
-            enc = face_recognition.face_encodings(rgb, known_face_locations=locs)
-            if len(enc):
-                print(f"[identify] Face encoded successfully at rotation {angle}")
-                return enc[0]
 
-    print("[identify] No face detected at any rotation.")
-    return None
+# ------------------------------------------------------------------------
+# Identity cache helpers
+# ------------------------------------------------------------------------
+def _read_crop(path, crop=None):
+    """Bytes to hash: the in-memory RGB crop if there is one, else the file."""
+    if crop is not None:
+        return np.ascontiguousarray(crop)
+    try:
+        with metrics.timer("read"), open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _cache_keys(items):
+    """One content key per item; None when the crop cannot be read."""
+    keys = []
+    for it in items:
+        data = _read_crop(it["img_path"], it.get("crop"))
+        if data is None:
+            log.error("Could not load image: %s", it["img_path"])
+            keys.append(None)
+        else:
+            keys.append(IdentityCache.key(data, it.get("face_location"), it.get("rotation")))
+    return keys
+
+
+def _match_and_store(encs, snapshot):
+    """
+    encs → key → encoding (None = no face). Matches all of them against
+    `snapshot` in one call and caches the results. Returns key → entry.
+    """
+    found = [k for k, e in encs.items() if e is not None]
+    matches = match_encodings([encs[k] for k in found], snapshot=snapshot) if found else []
+
+    entries = {k: IDENTITY_CACHE.put(k, None) for k, e in encs.items() if e is None}
+    for k, (name, score) in zip(found, matches):
+        entries[k] = IDENTITY_CACHE.put(k, encs[k], snapshot.version, name, score)
+    return entries
+
+
+def _lookup(key, snapshot):
+    """
+    → ("hit", entry), ("rematch", encoding) when only the gallery changed,
+      or ("miss", None) when the crop has to be encoded.
+    """
+    entry = IDENTITY_CACHE.get(key)
+    if entry is None:
+        return "miss", None
+    if entry.encoding is not None and entry.version != snapshot.version:
+        return "rematch", entry.encoding
+    return "hit", entry
+
+
+def _entry_result(entry):
+    if entry is None or entry.encoding is None:
+        return _result(None, None, enc_found=False)
+    return _result(entry.name, entry.score)
 
 
 # ------------------------------------------------------------------------
 # Main identification
 # ------------------------------------------------------------------------
-def find_best_person(face_path):
-    print("[identify] Processing:", face_path)
+def find_best_person(face_path, face_location=None, rotation=None, crop=None):
+    """crop → optional in-memory RGB crop of face_path (see crop_store)."""
+    log.debug("Processing: %s", face_path)
 
-    img = cv2.imread(face_path)
-    if img is None:
-        print("[identify] ERROR: Could not load image.")
+    data = _read_crop(face_path, crop)
+    if data is None:
+        log.error("Could not load image: %s", face_path)
         return "Unknown", None, []
 
-    # Step 1 — try encoding
-    enc = try_all_rotations(img)
+    snapshot = get_gallery()
+    key = IdentityCache.key(data, face_location, rotation)
+    state, cached = _lookup(key, snapshot)
+    if state == "hit":
+        return _entry_result(cached)
+
+    # Step 1 — encode (single pass when crop metadata is known)
+    enc = cached
+    if state == "miss" and crop is not None:
+        with metrics.timer("encode"):
+            enc = encode_face(crop, face_location, rotation, is_rgb=True)
+    elif state == "miss":
+        with metrics.timer("encode"):
+            img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            enc = encode_face(img, face_location, rotation) if img is not None else None
 
     if enc is None:
-        print("[encoding error] No face enc found:", face_path)
-        return "Unknown", None, []
+        log.info("No face encoding found: %s", face_path)
 
-    # Step 2 — compare with known encodings
-    best_name = "Unknown"
-    best_score = 999
+    # Step 2 — compare with the gallery, cache, return frontal.jpg list
+    return _entry_result(_match_and_store({key: enc}, snapshot)[key])
 
-    for person, enc_list in KNOWN_DB.items():
-        for known_enc in enc_list:
-            dist = np.linalg.norm(known_enc - enc)
-            if dist < best_score:
-                best_score = dist
-                best_name = person
 
-    # Threshold (tweakable)
-    if best_score > 0.55:
-        best_name = "Unknown"
+# ------------------------------------------------------------------------
+# Batch identification: encode across processes, match in one call
+# ------------------------------------------------------------------------
+def _encode_tasks(items):
+    """items → encoding-service tasks (see encoding_service.encode_task)."""
+    return [{
+        "path": it["img_path"],
+        "rgb": it.get("crop"),
+        "face_location": it.get("face_location"),
+        "rotation": it.get("rotation"),
+        "search_rotations": True,
+    } for it in items]
+
+
+def _result(name, score, enc_found=True):
+    if not enc_found:
+        return "Unknown", None, []
+    return name, float(score), frontal_paths_for(name)
+
+
+def iter_identify(items, service=None):
+    """
+    Yields (index, (name, score, frontal_paths)) as soon as each face is
+    encoded and matched. items → dicts with img_path and optional
+    face_location / rotation (see detect_faces_from_video(with_meta=True))
+    and crop, the RGB array itself (skips reading and decoding the JPEG).
+    Cached crops are answered first, without touching dlib.
+    """
+    service = service or get_service()
+    snapshot = get_gallery()
+    keys = _cache_keys(items)
+
+    todo = []
+    for i, key in enumerate(keys):
+        if key is None:
+            yield i, _result(None, None, enc_found=False)
+            continue
 
-    # Step 3 — return frontal.jpg list
-    frontal_path = os.path.join(KNOWN_BASE, best_name, "frontal.jpg")
-    if os.path.exists(frontal_path):
-        return best_name, float(best_score), [frontal_path]
+        state, cached = _lookup(key, snapshot)
+        if state == "miss":
+            todo.append(i)
+        elif state == "rematch":
+            yield i, _entry_result(_match_and_store({key: cached}, snapshot)[key])
+        else:
+            yield i, _entry_result(cached)
+
+    encoded = service.iter_encode(_encode_tasks([items[i] for i in todo]))
+    while True:
+        # time spent waiting on the pool for the next finished crop
+        t0 = time.perf_counter()
+        done = next(encoded, None)
+        if done is None:
+            break
+        metrics.observe("encode", time.perf_counter() - t0)
+
+        j, enc = done
+        key = keys[todo[j]]
+        yield todo[j], _entry_result(_match_and_store({key: enc}, snapshot)[key])
+
+
+def identify_faces(items, service=None):
+    """
+    Same as find_best_person for many crops: crops not in the identity
+    cache are encoded on the shared encoding process pool (see
+    encoding_service), then every encoding without a current match is
+    matched against the gallery in one vectorized call.
+    Returns one (name, score, frontal_paths) per item, in order.
+    """
+    service = service or get_service()
+    snapshot = get_gallery()
+    keys = _cache_keys(items)
+
+    entries, encs, todo = {}, {}, {}
+    for it, key in zip(items, keys):
+        if key is None or key in entries or key in encs or key in todo:
+            continue
+
+        state, cached = _lookup(key, snapshot)
+        if state == "miss":
+            todo[key] = it
+        elif state == "rematch":
+            encs[key] = cached
+        else:
+            entries[key] = cached
+
+    if todo:
+        with metrics.timer("encode", len(todo)):
+            encs.update(zip(todo, service.encode(_encode_tasks(list(todo.values())))))
+    entries.update(_match_and_store(encs, snapshot))
 
-    return best_name, float(best_score), []
+    return [_entry_result(entries.get(key)) for key in keys]
@@ -0,0 +1,152 @@
+# backend/utils/identity_cache.py
+
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+
+# encoding → 128-d vector, or None when no face was found in the crop
+# version  → gallery version the (name, score) match was made against
+CacheEntry = namedtuple("CacheEntry", "encoding version name score")
+
+
+# ------------------------------------------------------------------------
+# crop bytes (+ crop metadata) → encoding and match, LRU over SQLite
+# ------------------------------------------------------------------------
+class IdentityCache:
+    """
+    Remembers what dlib said about a crop, keyed by a hash of the crop
+    file's bytes, so the same crop is never encoded twice.
+
+    The encoding depends only on the crop, so it stays valid forever; the
+    (name, score) match is only reused while the gallery version it was
+    made against is still live — after a reload callers re-match the
+    cached encoding (fast) instead of re-encoding.
+
+    max_items      → entries kept in memory (LRU)
+    db_path        → optional SQLite file; entries then survive restarts
+    max_disk_items → rows kept on disk (least recently used are dropped)
+    """
+
+    def __init__(self, max_items=4096, db_path=None, max_disk_items=100_000):
+        self.max_items = max_items
+        self.max_disk_items = max_disk_items
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()
+        self._db = None
+        self._writes = 0
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS identities (
+                    key      TEXT PRIMARY KEY,
+                    encoding BLOB,
+                    version  TEXT,
+                    name     TEXT,
+                    score    REAL,
+                    used     REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    @staticmethod
+    def key(data, face_location=None, rotation=None):
+        """Content hash of the crop; box/rotation change the encoding too."""
+        h = hashlib.sha1(data)
+        if face_location is not None:
+            h.update(repr((tuple(int(v) for v in face_location), int(rotation or 0))).encode())
+        return h.hexdigest()
+
+    def __len__(self):
+        return len(self._mem)
+
+    # --------------------------------------------------------------------
+    # Lookup / store
+    # --------------------------------------------------------------------
+    def get(self, key):
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+            elif self._db is not None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._remember(key, entry)
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key, encoding, version=None, name=None, score=None):
+        if encoding is not None:
+            encoding = np.asarray(encoding, dtype=np.float64)
+        entry = CacheEntry(encoding, version, name,
+                           None if score is None else float(score))
+
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._store(key, entry)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM identities")
+                self._db.commit()
+
+    # --------------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # --------------------------------------------------------------------
+    def _remember(self, key, entry):
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def _load(self, key):
+        row = self._db.execute(
+            "SELECT encoding, version, name, score FROM identities WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._db.execute("UPDATE identities SET used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+
+        blob, version, name, score = row
+        encoding = np.frombuffer(blob, dtype=np.float64) if blob is not None else None
+        return CacheEntry(encoding, version, name, score)
+
+    def _store(self, key, entry):
+        blob = entry.encoding.tobytes() if entry.encoding is not None else None
+        self._db.execute(
+            "INSERT OR REPLACE INTO identities (key, encoding, version, name, score, used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, blob, entry.version, entry.name, entry.score, time.time()),
+        )
+
+        # Trim now and then rather than on every insert
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self._db.execute(
+                "DELETE FROM identities WHERE key NOT IN "
+                "(SELECT key FROM identities ORDER BY used DESC LIMIT ?)",
+                (self.max_disk_items,),
+            )
+        self._db.commit()
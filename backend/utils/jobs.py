@@ -0,0 +1,147 @@
+# backend/utils/jobs.py
+
+import time
+import logging
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.utils import metrics
+
+log = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------------
+# One background job (e.g. a video upload being processed)
+# ------------------------------------------------------------------------
+class Job:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.status = "queued"        # queued → running → done | error
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.frames_processed = 0
+        self.frames_total = 0
+        self.faces_found = 0
+        self.result = None
+        self.error = None
+        self.trace = None             # metrics.Trace when profiling was requested
+        self._lock = threading.Lock()
+
+    def update_progress(self, frames_processed=None, frames_total=None, faces_found=None):
+        with self._lock:
+            if frames_processed is not None:
+                self.frames_processed = frames_processed
+            if frames_total is not None:
+                self.frames_total = frames_total
+            if faces_found is not None:
+                self.faces_found = faces_found
+
+    def eta_seconds(self):
+        """Linear estimate from the frame rate seen so far."""
+        if self.status != "running" or not self.started:
+            return None
+        if not self.frames_total or not self.frames_processed:
+            return None
+
+        elapsed = time.time() - self.started
+        rate = self.frames_processed / elapsed if elapsed > 0 else 0
+        if rate <= 0:
+            return None
+
+        remaining = max(0, self.frames_total - self.frames_processed)
+        return round(remaining / rate, 1)
+
+    def to_dict(self):
+        with self._lock:
+            info = {
+                "job_id": self.job_id,
+                "status": self.status,
+                "frames_processed": self.frames_processed,
+                "frames_total": self.frames_total,
+                "faces_found": self.faces_found,
+                "eta_seconds": self.eta_seconds(),
+                "elapsed_seconds": round((self.finished or time.time()) - self.started, 1)
+                if self.started else 0,
+                "error": self.error,
+            }
+        if self.trace is not None:
+            info["profile"] = self.trace.to_dict()
+        return info
+
+
+# ------------------------------------------------------------------------
+# Worker pool + job registry
+# ------------------------------------------------------------------------
+class JobManager:
+    """
+    Runs blocking work (YOLO, dlib) on a worker pool so request handlers
+    return immediately with a job id.
+
+    fn is called as fn(job, *args) and its return value becomes job.result.
+    Only the newest `keep_finished` finished jobs are remembered.
+    With a trace (metrics.Trace) the job's stage timings are recorded in
+    it and reported by job.to_dict() under "profile".
+    """
+
+    def __init__(self, max_workers=1, keep_finished=256):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.keep_finished = keep_finished
+
+    def submit(self, fn, *args, before=None, trace=None):
+        """before(job_id), if given, runs before the job is queued."""
+        job = Job(uuid.uuid4().hex)
+        job.trace = trace
+        if before is not None:
+            before(job.job_id)
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+
+        self._pool.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+
+    def status_counts(self):
+        """status → number of remembered jobs (queued = waiting for a worker)."""
+        counts = {"queued": 0, "running": 0, "done": 0, "error": 0}
+        with self._lock:
+            for j in self._jobs.values():
+                counts[j.status] = counts.get(j.status, 0) + 1
+        return counts
+
+    def _run(self, job, fn, args):
+        job.status = "running"
+        job.started = time.time()
+        try:
+            with metrics.tracing(job.trace):
+                job.result = fn(job, *args)
+            job.status = "done"
+        except Exception as e:
+            log.exception("Job %s failed", job.job_id)
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        if len(finished) <= self.keep_finished:
+            return
+        finished.sort(key=lambda j: j.finished)
+        for j in finished[:len(finished) - self.keep_finished]:
+            del self._jobs[j.job_id]
+
+    def shutdown(self, wait=False):
+        self._pool.shutdown(wait=wait)
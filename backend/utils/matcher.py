@@ -0,0 +1,352 @@
+# backend/utils/matcher.py
+
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+ENC_DIM = 128
+
+# Upper bound on the (queries x gallery) distance block held in memory
+# at once (float32 elements, ~16 MB).
+MAX_BLOCK = 4_000_000
+
+
+def _sq_dists(q, q_sq, g, g_sq):
+    """(M x N) squared L2 distances, clipped at 0."""
+    d2 = q @ g.T
+    d2 *= -2.0
+    d2 += q_sq[:, None]
+    d2 += g_sq[None, :]
+    np.maximum(d2, 0.0, out=d2)
+    return d2
+
+
+def _top_k(d2, k):
+    """Row-wise k smallest → (dists², column indices), sorted ascending."""
+    k = min(k, d2.shape[1])
+    if k < d2.shape[1]:
+        idx = np.argpartition(d2, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(d2.shape[1]), d2.shape).copy()
+    part = np.take_along_axis(d2, idx, axis=1)
+    order = np.argsort(part, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+
+# ------------------------------------------------------------------------
+# Index backends: search(queries, k) → (distances, rows), both (M x k)
+# ------------------------------------------------------------------------
+class ExactIndex:
+    """Brute-force scan; recall is 1.0 by definition."""
+
+    name = "exact"
+
+    def __init__(self, encodings, sq_norms):
+        self.encodings = encodings
+        self.sq_norms = sq_norms
+
+    def search(self, queries, k=1):
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, ENC_DIM)
+        n = len(self.encodings)
+        k = min(k, n)
+        dists = np.full((len(q), k), np.inf, dtype=np.float32)
+        rows = np.full((len(q), k), -1, dtype=np.int64)
+
+        if n == 0 or len(q) == 0:
+            return dists, rows
+
+        q_sq = np.einsum("ij,ij->i", q, q)
+        step = max(1, MAX_BLOCK // n)
+
+        for s in range(0, len(q), step):
+            d2 = _sq_dists(q[s:s + step], q_sq[s:s + step], self.encodings, self.sq_norms)
+            dists[s:s + step], rows[s:s + step] = _top_k(d2, k)
+
+        return np.sqrt(dists), rows
+
+
+class IVFIndex:
+    """
+    Inverted-file index: k-means coarse quantizer over the gallery, each
+    query scans only the `nprobe` closest lists.
+
+    nlist  → number of clusters (default ≈ 4·√N)
+    nprobe → lists scanned per query; higher = better recall, more cost
+    """
+
+    name = "ivf"
+
+    def __init__(self, encodings, sq_norms, nlist=None, nprobe=8,
+                 train_iters=10, seed=0):
+        n = len(encodings)
+        self.nlist = max(1, min(n, int(nlist or 4 * np.sqrt(max(n, 1)))))
+        self.nprobe = max(1, int(nprobe))
+
+        if n == 0:
+            self.centroids = np.zeros((0, ENC_DIM), dtype=np.float32)
+            self.c_sq = np.zeros(0, dtype=np.float32)
+            self.order = np.zeros(0, dtype=np.int64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.encodings = encodings
+            self.sq_norms = sq_norms
+            return
+
+        self.centroids = self._train(encodings, sq_norms, train_iters, seed)
+        self.c_sq = np.einsum("ij,ij->i", self.centroids, self.centroids)
+
+        assign = self._assign(encodings, sq_norms)
+
+        # rows of each list stored contiguously → one slice per probe
+        self.order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=self.nlist)
+        self.offsets = np.r_[0, np.cumsum(counts)]
+        self.encodings = np.ascontiguousarray(encodings[self.order])
+        self.sq_norms = sq_norms[self.order]
+
+    def _assign(self, x, x_sq):
+        out = np.empty(len(x), dtype=np.int64)
+        step = max(1, MAX_BLOCK // self.nlist)
+        for s in range(0, len(x), step):
+            d2 = _sq_dists(x[s:s + step], x_sq[s:s + step], self.centroids, self.c_sq)
+            out[s:s + step] = np.argmin(d2, axis=1)
+        return out
+
+    def _train(self, x, x_sq, iters, seed):
+        rng = np.random.default_rng(seed)
+        sample = x
+        if len(x) > 256 * self.nlist:
+            sample = x[rng.choice(len(x), 256 * self.nlist, replace=False)]
+        sample = np.ascontiguousarray(sample, dtype=np.float32)
+        s_sq = np.einsum("ij,ij->i", sample, sample)
+
+        self.centroids = sample[rng.choice(len(sample), self.nlist, replace=False)].copy()
+        for _ in range(iters):
+            self.c_sq = np.einsum("ij,ij->i", self.centroids, self.centroids)
+            assign = self._assign(sample, s_sq)
+            counts = np.bincount(assign, minlength=self.nlist)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assign, sample)
+            nonempty = counts > 0
+            self.centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+
+        return self.centroids
+
+    def search(self, queries, k=1, nprobe=None):
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, ENC_DIM)
+        dists = np.full((len(q), k), np.inf, dtype=np.float32)
+        rows = np.full((len(q), k), -1, dtype=np.int64)
+
+        if len(self.encodings) == 0 or len(q) == 0:
+            return dists, rows
+
+        nprobe = min(self.nlist, int(nprobe or self.nprobe))
+        q_sq = np.einsum("ij,ij->i", q, q)
+        c_d2 = _sq_dists(q, q_sq, self.centroids, self.c_sq)
+        probes = np.argpartition(c_d2, nprobe - 1, axis=1)[:, :nprobe]
+
+        for i, lists in enumerate(probes):
+            cand = np.concatenate([
+                np.arange(self.offsets[c], self.offsets[c + 1]) for c in lists
+            ])
+            if len(cand) == 0:
+                continue
+
+            d2 = _sq_dists(q[i:i + 1], q_sq[i:i + 1],
+                           self.encodings[cand], self.sq_norms[cand])
+            kd, kc = _top_k(d2, k)
+            kk = kd.shape[1]
+            dists[i, :kk] = np.sqrt(kd[0])
+            rows[i, :kk] = self.order[cand[kc[0]]]
+
+        return dists, rows
+
+
+INDEX_BACKENDS = {
+    ExactIndex.name: ExactIndex,
+    IVFIndex.name: IVFIndex,
+}
+
+
+# ------------------------------------------------------------------------
+# Whole gallery as one contiguous (N x 128) float32 matrix
+# ------------------------------------------------------------------------
+class GalleryMatcher:
+    """
+    names     → list of person names (label → name)
+    labels    → (N,) int array, sorted, one label per gallery row
+    encodings → (N x 128) float32 matrix, rows grouped by label
+
+    With the default exact index all queries are matched with one
+    vectorized distance computation and a per-person min reduction over
+    the contiguous label runs. index="ivf" (see IVFIndex) trades a little
+    recall for sub-linear search on very large galleries; extra keyword
+    arguments are passed to the index backend.
+    """
+
+    def __init__(self, names, labels, encodings, index="exact", **index_params):
+        encodings = np.ascontiguousarray(encodings, dtype=np.float32)
+        labels = np.asarray(labels, dtype=np.int64)
+
+        if encodings.ndim != 2 or encodings.shape[1] != ENC_DIM:
+            raise ValueError(f"Expected (N x {ENC_DIM}) encodings, got {encodings.shape}")
+        if len(labels) != len(encodings):
+            raise ValueError("labels and encodings must have the same length")
+
+        if len(labels) and np.any(np.diff(labels) < 0):
+            order = np.argsort(labels, kind="stable")
+            labels = labels[order]
+            encodings = np.ascontiguousarray(encodings[order])
+
+        self.names = list(names)
+        self.labels = labels
+        self.encodings = encodings
+        self.sq_norms = np.einsum("ij,ij->i", encodings, encodings)
+
+        # start row of every label run → np.minimum.reduceat segments
+        if len(labels):
+            self.run_starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+            self.run_labels = labels[self.run_starts]
+        else:
+            self.run_starts = np.zeros(0, dtype=np.int64)
+            self.run_labels = np.zeros(0, dtype=np.int64)
+
+        if index not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend: {index}")
+        self.index = INDEX_BACKENDS[index](self.encodings, self.sq_norms, **index_params)
+
+    def __len__(self):
+        return len(self.encodings)
+
+    # --------------------------------------------------------------------
+    @classmethod
+    def from_dict(cls, known_dict, **kwargs):
+        """
+        person → (k x 128) array / list of 128-D vectors. Singleton axes
+        are dropped ((k, 1, 128) is fine); entries whose vectors are not
+        128-D (e.g. 512-D embeddings from another model) are skipped.
+        """
+        names, labels, blocks = [], [], []
+
+        for name, vectors in known_dict.items():
+            try:
+                arr = np.asarray(vectors, dtype=np.float32)
+            except Exception:
+                log.warning("Skipping %s: not a numeric array", name)
+                continue
+
+            arr = arr.reshape([d for d in arr.shape if d != 1] or [arr.size])
+            if arr.ndim == 1:
+                arr = arr[None, :]
+
+            if arr.size == 0:
+                continue
+            if arr.ndim != 2 or arr.shape[1] != ENC_DIM:
+                log.warning("Skipping %s: expected %d-D vectors, got shape %s",
+                            name, ENC_DIM, np.shape(vectors))
+                continue
+
+            labels.append(np.full(len(arr), len(names), dtype=np.int64))
+            blocks.append(arr)
+            names.append(name)
+
+        if not blocks:
+            return cls([], np.zeros(0, dtype=np.int64), np.zeros((0, ENC_DIM), np.float32), **kwargs)
+
+        return cls(names, np.concatenate(labels), np.vstack(blocks), **kwargs)
+
+    @classmethod
+    def from_index(cls, entries, encodings, **kwargs):
+        """
+        Build straight from encoding_index output. Rows are already grouped
+        by person, so the memory-mapped array is used without a copy.
+        """
+        names, name_ids = [], {}
+        labels = np.full(len(encodings), -1, dtype=np.int64)
+
+        for e in entries:
+            if e["row"] < 0:
+                continue
+            person = e["person"]
+            if person not in name_ids:
+                name_ids[person] = len(names)
+                names.append(person)
+            labels[e["row"]] = name_ids[person]
+
+        keep = labels >= 0
+        if not keep.all():
+            return cls(names, labels[keep], np.asarray(encodings)[keep], **kwargs)
+
+        return cls(names, labels, encodings, **kwargs)
+
+    # --------------------------------------------------------------------
+    def person_distances(self, queries):
+        """
+        queries → (M x 128) or single 128-D vector
+        returns → (M x P) matrix: min distance from each query to each person
+
+        Always exact, whatever the index backend.
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, ENC_DIM)
+        out = np.empty((len(q), len(self.run_starts)), dtype=np.float32)
+
+        if len(self) == 0 or len(q) == 0:
+            return out
+
+        q_sq = np.einsum("ij,ij->i", q, q)
+        step = max(1, MAX_BLOCK // len(self))
+
+        for s in range(0, len(q), step):
+            # ||q - g||² = ||q||² + ||g||² - 2 q·g
+            d2 = _sq_dists(q[s:s + step], q_sq[s:s + step], self.encodings, self.sq_norms)
+            out[s:s + step] = np.minimum.reduceat(d2, self.run_starts, axis=1)
+
+        np.sqrt(out, out=out)
+        return out
+
+    def search(self, queries, k=1, **params):
+        """Nearest gallery rows via the index → (distances, rows), (M x k)."""
+        return self.index.search(queries, k, **params)
+
+    def match(self, queries, threshold):
+        """
+        Returns one (name, distance) per query. Names above `threshold`
+        come back as "Unknown" (with the best distance still reported).
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(-1, ENC_DIM)
+
+        if len(self) == 0:
+            return [("Unknown", float("inf")) for _ in range(len(q))]
+
+        if isinstance(self.index, ExactIndex):
+            dists = self.person_distances(q)
+            best = np.argmin(dists, axis=1)
+            best_dist = dists[np.arange(len(q)), best]
+            best_label = self.run_labels[best]
+        else:
+            # nearest row's person == nearest person
+            d, rows = self.index.search(q, 1)
+            best_dist = d[:, 0]
+            best_label = np.where(rows[:, 0] >= 0, self.labels[rows[:, 0]], -1)
+
+        results = []
+        for dist, label in zip(best_dist, best_label):
+            dist = float(dist)
+            if label < 0 or dist > threshold:
+                results.append(("Unknown", dist))
+            else:
+                results.append((self.names[label], dist))
+
+        return results
+
+    def match_one(self, query, threshold):
+        return self.match(query, threshold)[0]
+
+
+def as_matcher(known):
+    """Accept either a prebuilt GalleryMatcher or a person → vectors dict."""
+    if isinstance(known, GalleryMatcher):
+        return known
+    return GalleryMatcher.from_dict(known or {})
@@ -0,0 +1,257 @@
+# backend/utils/metrics.py
+
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+
+# Seconds; fine at the low end (crop/hash/match), coarse for whole requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ------------------------------------------------------------------------
+# Metric types (Prometheus text exposition, no client library needed)
+# ------------------------------------------------------------------------
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        """
+        fn, if given, is called at scrape time instead of keeping values:
+        → a number (no labels), or a dict label value(s) → number
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._values = {}
+        self._lock = threading.Lock()
+
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _collect(self):
+        if self.fn is None:
+            with self._lock:
+                return dict(self._values)
+
+        values = self.fn()
+        if not isinstance(values, dict):
+            return {(): values}
+        return {(k if isinstance(k, tuple) else (k,)): v for k, v in values.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (last one = +Inf), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][idx] += 1
+            state[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _labels(self.labelnames, key, [("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def render():
+    """Every registered metric in Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_registry)
+
+    lines = []
+    for m in metrics:
+        try:
+            lines.extend(m.render())
+        except Exception:
+            continue    # a broken callback must not take /metrics down
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ------------------------------------------------------------------------
+# Pipeline stages
+#   decode, yolo, crop, hash, read, write, thumbnail, encode, match
+# ------------------------------------------------------------------------
+STAGE_SECONDS = Histogram("facetrack_stage_seconds",
+                          "Time per call of a pipeline stage", ["stage"])
+STAGE_ITEMS = Counter("facetrack_stage_items_total",
+                      "Items (frames, crops, queries) handled per stage", ["stage"])
+QUEUE_DEPTH = Gauge("facetrack_pipeline_queue_depth",
+                    "Items waiting between detection pipeline stages", ["queue"])
+HTTP_SECONDS = Histogram("facetrack_http_request_seconds",
+                         "HTTP request latency per route", ["method", "route", "status"])
+
+
+def observe(stage, seconds, items=1):
+    """Records one timed call of `stage` (and adds it to the active trace)."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if items:
+        STAGE_ITEMS.inc(items, stage=stage)
+
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(stage, seconds, items)
+
+
+@contextmanager
+def timer(stage, items=1):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - t0, items)
+
+
+# ------------------------------------------------------------------------
+# Opt-in per-request profiling
+# ------------------------------------------------------------------------
+class Trace:
+    """
+    Stage timings of one request (or job): per-stage totals for every
+    call, plus the first `max_spans` individual spans in call order.
+    """
+
+    def __init__(self, max_spans=500):
+        self.start = time.perf_counter()
+        self.max_spans = max_spans
+        self.spans = []
+        self.stages = {}      # stage → [calls, items, seconds]
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, items=1):
+        end = time.perf_counter() - self.start
+        with self._lock:
+            total = self.stages.setdefault(stage, [0, 0, 0.0])
+            total[0] += 1
+            total[1] += items
+            total[2] += seconds
+            if len(self.spans) < self.max_spans:
+                self.spans.append((stage, end - seconds, seconds, threading.current_thread().name))
+
+    def server_timing(self):
+        """Server-Timing header value (shown by browser dev tools)."""
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda kv: -kv[1][2])
+        parts = [f"{s};dur={t * 1000:.2f};desc=\"{c}x\"" for s, (c, _, t) in stages]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.2f}")
+        return ", ".join(parts)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "elapsed_ms": round((time.perf_counter() - self.start) * 1000, 2),
+                "stages": {s: {"calls": c, "items": n, "ms": round(t * 1000, 2)}
+                           for s, (c, n, t) in self.stages.items()},
+                "spans": [{"stage": s, "start_ms": round(b * 1000, 2),
+                           "ms": round(t * 1000, 3), "thread": th}
+                          for s, b, t, th in self.spans],
+            }
+
+
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def current_trace():
+    return _trace.get()
+
+
+@contextmanager
+def tracing(trace):
+    """Makes `trace` (may be None) the active trace for this context."""
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def bind(fn):
+    """
+    fn running in the caller's context — for threads started while a
+    trace is active (new threads otherwise start without one).
+    """
+    if _trace.get() is None:
+        return fn
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
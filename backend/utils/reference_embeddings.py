@@ -1,10 +1,15 @@
 # backend/utils/reference_embeddings.py
 
 import os
+import logging
 import numpy as np
-import face_recognition
 from typing import Dict
 
+from backend.utils.encoding_service import get_service
+from backend.utils.matcher import as_matcher
+
+log = logging.getLogger(__name__)
+
 # Correct absolute path to persons folder
 PERSONS_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "persons")
@@ -20,38 +25,34 @@ def load_reference_embeddings(min_images_per_person: int = 1) -> Dict[str, np.nd
     known = {}
 
     if not os.path.isdir(PERSONS_DIR):
-        print(f"[WARN] persons dir not found: {PERSONS_DIR}")
+        log.warning("Persons dir not found: %s", PERSONS_DIR)
         return known
 
+    # Collect every image first, then encode them in one parallel batch
+    images = []
+    by_person = {}
     for person in os.listdir(PERSONS_DIR):
         person_dir = os.path.join(PERSONS_DIR, person)
         if not os.path.isdir(person_dir):
             continue
 
-        encs = []
-
+        by_person[person] = []
         for fname in os.listdir(person_dir):
-            if not fname.lower().endswith((".jpg", ".jpeg", ".png")):
-                continue
+            if fname.lower().endswith((".jpg", ".jpeg", ".png")):
+                images.append((person, os.path.join(person_dir, fname)))
 
-            img_path = os.path.join(person_dir, fname)
+    encodings = get_service().encode([{"path": path} for _, path in images])
 
-            try:
-                img = face_recognition.load_image_file(img_path)
-                embedding_list = face_recognition.face_encodings(img)
-
-                if embedding_list:
-                    encs.append(embedding_list[0])
-
-            except Exception as e:
-                print(f"[WARN] failed load {img_path}: {e}")
-                continue
+    for (person, _), enc in zip(images, encodings):
+        if enc is not None:
+            by_person[person].append(enc)
 
+    for person, encs in by_person.items():
         if len(encs) >= min_images_per_person:
             known[person] = np.vstack(encs)
-            print(f"[INFO] Loaded embeddings for {person}: {len(encs)} images")
+            log.info("Loaded embeddings for %s: %d images", person, len(encs))
         else:
-            print(f"[WARN] Not enough images for {person} (got {len(encs)}), skipping")
+            log.warning("Not enough images for %s (got %d), skipping", person, len(encs))
 
     return known
 
@@ -62,26 +63,13 @@ def load_reference_embeddings(min_images_per_person: int = 1) -> Dict[str, np.nd
 def best_match_for_encoding(encoding, known_dict, threshold=0.55):
     """
     Returns: (best_person_name, best_distance)
+    known_dict may also be a prebuilt GalleryMatcher.
     """
     if encoding is None or known_dict is None or len(known_dict) == 0:
         return "Unknown", float("inf")
 
-    best_name = "Unknown"
-    best_dist = float("inf")
-
-    for name, encodings in known_dict.items():
-
-        try:
-            distances = face_recognition.face_distance(encodings, encoding)
-            min_dist = float(np.min(distances))
-        except Exception:
-            continue
-
-        if min_dist < best_dist:
-            best_dist = min_dist
-            best_name = name
-
-    if best_dist > threshold:
-        return "Unknown", best_dist
+    matcher = as_matcher(known_dict)
+    if len(matcher) == 0:
+        return "Unknown", float("inf")
 
-    return best_name, best_dist
+    return matcher.match_one(encoding, threshold)
@@ -0,0 +1,227 @@
+# backend/utils/result_store.py
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+# ------------------------------------------------------------------------
+# Per-job face mappings: in-memory LRU/TTL cache over a local SQLite file
+# ------------------------------------------------------------------------
+class ResultStore:
+    """
+    Every upload job gets its own crop directory (jobs_dir/<job_id>/faces)
+    and its own rows in SQLite, so concurrent users never overwrite each
+    other. Single-face updates touch one row instead of rewriting a whole
+    JSON file.
+
+    max_jobs    → how many jobs are kept hot in memory (LRU)
+    ttl_seconds → jobs older than this are evicted from memory, SQLite and
+                  disk by evict_expired()
+    """
+
+    def __init__(self, db_path, jobs_dir, max_jobs=32, ttl_seconds=24 * 3600):
+        self.db_path = db_path
+        self.jobs_dir = jobs_dir
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        os.makedirs(jobs_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._cache = OrderedDict()   # job_id → OrderedDict(track_id → face)
+
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id  TEXT PRIMARY KEY,
+                created REAL NOT NULL,
+                status  TEXT NOT NULL DEFAULT 'queued',
+                error   TEXT
+            );
+            CREATE TABLE IF NOT EXISTS faces (
+                job_id   TEXT NOT NULL,
+                track_id TEXT NOT NULL,
+                idx      INTEGER NOT NULL,
+                data     TEXT NOT NULL,
+                PRIMARY KEY (job_id, track_id)
+            );
+        """)
+        self._db.commit()
+
+    # --------------------------------------------------------------------
+    # Jobs
+    # --------------------------------------------------------------------
+    def job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def faces_dir(self, job_id):
+        return os.path.join(self.job_dir(job_id), "faces")
+
+    def create_job(self, job_id):
+        """Registers the job and returns its (empty) crop directory."""
+        face_dir = self.faces_dir(job_id)
+        os.makedirs(face_dir, exist_ok=True)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, created, status) VALUES (?, ?, 'queued')",
+                (job_id, time.time()),
+            )
+            self._db.commit()
+            self._remember(job_id, OrderedDict())
+
+        return face_dir
+
+    def set_status(self, job_id, status, error=None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ? WHERE job_id = ?",
+                (status, error, job_id),
+            )
+            self._db.commit()
+
+    def job_info(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, error, created FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"job_id": job_id, "status": row[0], "error": row[1], "created": row[2]}
+
+    def latest_job(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT job_id FROM jobs ORDER BY created DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    # --------------------------------------------------------------------
+    # Faces
+    # --------------------------------------------------------------------
+    def add_faces(self, job_id, faces):
+        """Append face dicts (each with a track_id) in one transaction."""
+        with self._lock:
+            cached = self._load(job_id)
+            start = len(cached) if cached is not None else 0
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO faces (job_id, track_id, idx, data) VALUES (?, ?, ?, ?)",
+                [(job_id, f["track_id"], start + i, json.dumps(f)) for i, f in enumerate(faces)],
+            )
+            self._db.commit()
+
+            if cached is not None:
+                for f in faces:
+                    cached[f["track_id"]] = dict(f)
+
+    def update_faces(self, job_id, updates):
+        """updates → {track_id: {field: value}}; one row write per face."""
+        with self._lock:
+            faces = self._load(job_id)
+            if faces is None:
+                return
+
+            rows = []
+            for tid, fields in updates.items():
+                if tid not in faces:
+                    continue
+                faces[tid].update(fields)
+                rows.append((json.dumps(faces[tid]), job_id, tid))
+
+            self._db.executemany(
+                "UPDATE faces SET data = ? WHERE job_id = ? AND track_id = ?", rows
+            )
+            self._db.commit()
+
+    def update_face(self, job_id, track_id, **fields):
+        self.update_faces(job_id, {track_id: fields})
+
+    def get_faces(self, job_id):
+        """track_id → face dict (copies), in detection order; None if unknown."""
+        with self._lock:
+            faces = self._load(job_id)
+            if faces is None:
+                return None
+            return OrderedDict((tid, dict(f)) for tid, f in faces.items())
+
+    def get_face(self, job_id, track_id):
+        with self._lock:
+            faces = self._load(job_id)
+            if faces is None or track_id not in faces:
+                return None
+            return dict(faces[track_id])
+
+    # --------------------------------------------------------------------
+    # Eviction
+    # --------------------------------------------------------------------
+    def evict_expired(self, on_expire=None):
+        """
+        Drop jobs past their TTL from memory, SQLite and disk. on_expire
+        (job_id), if given, runs before each job's directory is deleted.
+        """
+        cutoff = time.time() - self.ttl_seconds
+
+        with self._lock:
+            expired = [r[0] for r in self._db.execute(
+                "SELECT job_id FROM jobs WHERE created < ?", (cutoff,)
+            )]
+            for job_id in expired:
+                self._db.execute("DELETE FROM faces WHERE job_id = ?", (job_id,))
+                self._db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+                self._cache.pop(job_id, None)
+            self._db.commit()
+
+        for job_id in expired:
+            if on_expire:
+                on_expire(job_id)
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+        return expired
+
+    def face_values(self, field):
+        """Distinct non-null values of one face field across all jobs."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT json_extract(data, ?) FROM faces "
+                "WHERE json_extract(data, ?) IS NOT NULL",
+                (f"$.{field}", f"$.{field}"),
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    # --------------------------------------------------------------------
+    # Internals (call with self._lock held)
+    # --------------------------------------------------------------------
+    def _remember(self, job_id, faces):
+        self._cache[job_id] = faces
+        self._cache.move_to_end(job_id)
+        while len(self._cache) > self.max_jobs:
+            self._cache.popitem(last=False)
+
+    def _load(self, job_id):
+        if job_id in self._cache:
+            self._cache.move_to_end(job_id)
+            return self._cache[job_id]
+
+        exists = self._db.execute(
+            "SELECT 1 FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if not exists:
+            return None
+
+        faces = OrderedDict()
+        for tid, data in self._db.execute(
+            "SELECT track_id, data FROM faces WHERE job_id = ? ORDER BY idx", (job_id,)
+        ):
+            faces[tid] = json.loads(data)
+
+        self._remember(job_id, faces)
+        return faces
@@ -0,0 +1,145 @@
+# backend/utils/stream_ingest.py
+
+import time
+import logging
+import threading
+import cv2
+
+log = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------------
+# File that is still being written by the upload handler
+# ------------------------------------------------------------------------
+class GrowingFile:
+    """
+    The request handler appends chunks with write() and calls finish()
+    (or fail()) at the end; readers block in wait_for_growth() until more
+    bytes arrive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.bytes_written = 0
+        self.complete = False
+        self.error = None
+        self._cond = threading.Condition()
+        self._fh = open(path, "wb")
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        self._fh.write(chunk)
+        self._fh.flush()
+        with self._cond:
+            self.bytes_written += len(chunk)
+            self._cond.notify_all()
+
+    def finish(self):
+        self._close(None)
+
+    def fail(self, error):
+        self._close(str(error) or "upload failed")
+
+    def _close(self, error):
+        try:
+            self._fh.close()
+        finally:
+            with self._cond:
+                self.complete = True
+                self.error = error
+                self._cond.notify_all()
+
+    def wait_for_growth(self, seen_bytes, timeout):
+        """
+        Block until more than `seen_bytes` are on disk or the upload ends.
+        Returns False if nothing happened within `timeout` seconds.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while self.bytes_written <= seen_bytes and not self.complete:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+
+# ------------------------------------------------------------------------
+# Decode frames while the upload is still in progress
+# ------------------------------------------------------------------------
+def iter_growing_video(growing, wants=None, min_bytes=256 * 1024, idle_timeout=120.0):
+    """
+    Yields BGR frames from `growing` as soon as they are decodable (and
+    the frame after them too, so a frame is never yielded half-written).
+
+    wants(frame_id), if given (1-based ids, e.g. a sampler's wants_frame),
+    picks the frames to return: the others are only grab()bed, never
+    retrieved, and (frame_id, frame) pairs are yielded instead.
+
+    OpenCV/FFmpeg stop at the current end of file; when enough new data
+    has arrived (at least min_bytes or +25%) the capture is reopened and
+    skips the frames already handled with grab(). Frame-accurate seeking
+    is not reliable on truncated files, grab() is. Only the number of
+    reopens is logarithmic in the file size: each reopen grabs every
+    frame handled so far again. With the +25% step that adds up to about
+    4x the stream's frames in extra grab() calls (1 / (1 - 1/1.25) - 1).
+    grab() demuxes and decodes but skips the BGR conversion.
+    Containers that keep their index at the end (non-faststart MP4) can
+    only be opened once the upload completes — those simply start late.
+    """
+    next_frame = 0
+    seen = 0
+
+    while True:
+        # Wait for the first chunk of data (or for enough new data)
+        target = seen + max(min_bytes, seen // 4) - 1
+        if not growing.wait_for_growth(target, idle_timeout):
+            raise TimeoutError(f"Upload stalled: {growing.path}")
+        if growing.error:
+            raise IOError(growing.error)
+
+        complete = growing.complete
+        seen = growing.bytes_written
+
+        cap = cv2.VideoCapture(growing.path)
+        if cap.isOpened():
+            try:
+                skipped = 0
+                while skipped < next_frame and cap.grab():
+                    skipped += 1
+
+                # The last frame before the current end of file may be cut
+                # off (its bytes still arriving): hold each wanted frame back
+                # until the next one can be grabbed, or the upload is complete.
+                held = None
+                if skipped == next_frame:
+                    while cap.grab():
+                        if held is not None:
+                            next_frame += 1
+                            yield held
+                            held = None
+
+                        frame_id = next_frame + 1
+                        if wants is not None and not wants(frame_id):
+                            next_frame += 1
+                            continue
+
+                        ret, frame = cap.retrieve()
+                        if not ret:
+                            break
+                        held = frame if wants is None else (frame_id, frame)
+
+                if held is not None and complete:
+                    next_frame += 1
+                    yield held
+            finally:
+                cap.release()
+        elif complete:
+            log.error("Cannot open video: %s", growing.path)
+            return
+
+        # Everything on disk was already there when we opened it → done
+        if complete:
+            return
+
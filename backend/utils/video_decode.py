@@ -0,0 +1,210 @@
+# backend/utils/video_decode.py
+
+import re
+import logging
+import queue
+import shutil
+import subprocess
+import threading
+import cv2
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+# Seeking re-decodes from the previous keyframe, so it only beats grab()
+# when the stride spans a good part of a GOP.
+SEEK_MIN_STRIDE = 15
+
+
+# ------------------------------------------------------------------------
+# Optional reduced-resolution output
+# ------------------------------------------------------------------------
+def _scaled_size(width, height, scale):
+    """scale < 1 → factor; scale > 1 → max width in pixels."""
+    if not scale or width <= 0 or height <= 0:
+        return None
+    factor = scale if scale <= 1 else min(1.0, scale / float(width))
+    if factor >= 1:
+        return None
+    w = max(2, int(round(width * factor / 2)) * 2)
+    h = max(2, int(round(height * factor / 2)) * 2)
+    return w, h
+
+
+def _downscale(frame, size):
+    if size is None or frame is None:
+        return frame
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+# ------------------------------------------------------------------------
+# Sequential: grab() every frame, retrieve() only the wanted ones
+# ------------------------------------------------------------------------
+def iter_grab(cap, wants, scale=None, start=0, end=None):
+    """
+    Yields (frame_id, frame) for frames where wants(frame_id) is true.
+    Skipped frames are only grabbed (demuxed/decoded, never converted to
+    BGR or copied out), so sampling every Nth frame gets cheaper with N.
+    OpenCV cannot decode at a lower resolution; `scale` resizes right
+    after retrieve so everything downstream works on the smaller frame.
+    start/end limit the pass to frame ids start+1 .. end (one seek to start).
+    """
+    size = _scaled_size(cap.get(cv2.CAP_PROP_FRAME_WIDTH),
+                        cap.get(cv2.CAP_PROP_FRAME_HEIGHT), scale)
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    frame_id = start
+    try:
+        while (end is None or frame_id < end) and cap.grab():
+            frame_id += 1
+            if not wants(frame_id):
+                continue
+            ret, frame = cap.retrieve()
+            if ret:
+                yield frame_id, _downscale(frame, size)
+    finally:
+        cap.release()
+
+
+# ------------------------------------------------------------------------
+# Strided seeking: jump straight to every `stride`-th frame
+# ------------------------------------------------------------------------
+def iter_seek(cap, stride, scale=None, start=0, end=None):
+    """
+    Yields every `stride`-th frame by setting CAP_PROP_POS_FRAMES. The
+    decoder restarts at the nearest keyframe, so cost scales with the
+    number of sampled frames rather than the length of the video.
+    """
+    stride = max(1, int(stride))
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if end is not None:
+        total = min(total, end) if total > 0 else end
+    size = _scaled_size(cap.get(cv2.CAP_PROP_FRAME_WIDTH),
+                        cap.get(cv2.CAP_PROP_FRAME_HEIGHT), scale)
+    frame_id = (start // stride + 1) * stride
+    try:
+        while total <= 0 or frame_id <= total:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id - 1)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_id, _downscale(frame, size)
+            frame_id += stride
+    finally:
+        cap.release()
+
+
+# ------------------------------------------------------------------------
+# Keyframes only (FFmpeg -skip_frame nokey)
+# ------------------------------------------------------------------------
+_PTS_RE = re.compile(rb"pts_time:\s*([0-9.eE+-]+)")
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def iter_keyframes(video_path, width, height, fps, scale=None, start=0, end=None):
+    """
+    Decodes only I-frames through an ffmpeg subprocess (non-key frames are
+    dropped inside the decoder, never decoded). Scaling happens in the
+    same ffmpeg process. frame_id is derived from each frame's timestamp
+    (showinfo) so downstream code sees real positions in the video.
+    """
+    size = _scaled_size(width, height, scale) or (int(width), int(height))
+    w, h = size
+    fps = fps if fps and fps > 0 else 30.0
+
+    # -copyts keeps timestamps absolute after the input seek
+    seek = ["-ss", f"{start / fps:.3f}", "-copyts"] if start > 0 else []
+
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "info", "-nostdin",
+        *seek, "-skip_frame", "nokey", "-i", video_path,
+        "-vf", f"scale={w}:{h},showinfo",
+        "-vsync", "0",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    times = queue.Queue()
+
+    def read_stderr():
+        for line in proc.stderr:
+            m = _PTS_RE.search(line)
+            if m:
+                times.put(float(m.group(1)))
+        times.put(None)
+
+    threading.Thread(target=read_stderr, daemon=True).start()
+
+    frame_bytes = w * h * 3
+    last_id = 0
+    try:
+        while True:
+            buf = proc.stdout.read(frame_bytes)
+            if len(buf) < frame_bytes:
+                break
+
+            try:
+                t = times.get(timeout=5)
+            except queue.Empty:
+                t = None
+
+            frame_id = last_id + 1 if t is None else max(last_id + 1, int(round(t * fps)) + 1)
+            last_id = frame_id
+            if frame_id <= start:
+                continue            # keyframe before the requested range
+            if end is not None and frame_id > end:
+                break
+            yield frame_id, np.frombuffer(buf, np.uint8).reshape(h, w, 3)
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+# ------------------------------------------------------------------------
+# Frame source factory
+# ------------------------------------------------------------------------
+def open_frames(video_path, wants, mode="grab", stride=1, scale=None, start=0, end=None):
+    """
+    Returns (frames, info) or (None, None) if the video cannot be opened.
+    start/end restrict decoding to frame ids start+1 .. end (a segment).
+
+    frames → iterator of (frame_id, BGR frame)
+    info   → dict: frames_total, fps, mode (the mode actually used)
+
+    mode:
+      "grab"      → sequential, skipped frames grabbed but not retrieved
+      "seek"      → jump every `stride` frames (falls back to grab for
+                    short strides where seeking costs more than it saves)
+      "keyframes" → I-frames only via ffmpeg (falls back to seek)
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None, None
+
+    info = {
+        "frames_total": max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)),
+        "fps": cap.get(cv2.CAP_PROP_FPS) or 0.0,
+        "mode": mode,
+    }
+
+    if mode == "keyframes":
+        if ffmpeg_available():
+            width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+            height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+            cap.release()
+            return iter_keyframes(video_path, width, height, info["fps"],
+                                  scale, start, end), info
+        log.warning("ffmpeg not found, keyframe mode falls back to seek")
+        mode = "seek"
+        stride = max(stride, int(round(info["fps"] or 30)))
+
+    if mode == "seek" and stride >= SEEK_MIN_STRIDE:
+        info["mode"] = "seek"
+        return iter_seek(cap, stride, scale, start, end), info
+
+    info["mode"] = "grab"
+    return iter_grab(cap, wants, scale, start, end), info
@@ -0,0 +1,86 @@
+# backend/utils/warmup.py
+
+import time
+import logging
+import threading
+
+from backend.utils.detect_faces_from_video import warm_detector, yolo_loaded
+from backend.utils.encoding_service import encoder_loaded, get_service
+from backend.utils.identify_person import gallery_loaded, get_gallery
+
+log = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------------
+# Heavy components: (name, load, is_loaded), in load order
+# The encoder pool comes first so a gallery rebuild runs on warm workers.
+# ------------------------------------------------------------------------
+COMPONENTS = [
+    ("encoder", lambda: get_service().warm_up(), encoder_loaded),
+    ("gallery", get_gallery, gallery_loaded),
+    ("detector", warm_detector, yolo_loaded),
+]
+
+
+class WarmUp:
+    """
+    Loads every component once, in a background thread. Anything already
+    loaded by a request counts as ready too, so status() is always the
+    real state; a failed component is retried on the next start().
+    """
+
+    def __init__(self, components):
+        self.components = components
+        self._state = {name: {"status": "pending"} for name, _, _ in components}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if not self.ready():
+                    self._thread = threading.Thread(target=self._run, name="warmup",
+                                                    daemon=True)
+                    self._thread.start()
+        return self.status()
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.status()
+
+    def _run(self):
+        for name, load, _ in self.components:
+            if self._state[name]["status"] == "ready":
+                continue
+
+            self._state[name] = {"status": "loading"}
+            t0 = time.time()
+            try:
+                load()
+                self._state[name] = {"status": "ready",
+                                     "seconds": round(time.time() - t0, 2)}
+                log.info("%s ready in %.1fs", name, time.time() - t0)
+            except Exception as e:
+                log.error("%s failed: %s", name, e)
+                self._state[name] = {"status": "error", "error": str(e)}
+
+    def status(self):
+        components = {}
+        for name, _, is_loaded in self.components:
+            state = dict(self._state[name])
+            if state["status"] != "ready" and is_loaded():
+                state["status"] = "ready"
+            components[name] = state
+
+        return {
+            "ready": all(c["status"] == "ready" for c in components.values()),
+            "components": components,
+        }
+
+    def ready(self):
+        return self.status()["ready"]
+
+
+warmup = WarmUp(COMPONENTS)